@@ -0,0 +1,182 @@
+# Description: data-driven badge engine. Badge definitions live in the
+# achievements table and are loaded once per process; each event evaluates
+# every rule against the author's UserStats counters in a single pass and
+# awards all newly earned badges with one batched insert into UserBadge.
+
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+from sqlalchemy import select, update, func
+from extensions import db
+from model import Achievement, Post, User, UserBadge, UserStats, UserVote, insert_ignore
+from current_user import get_identity
+from user_stats import get_user_stats
+
+AchievementRule = namedtuple('AchievementRule', 'name category threshold')
+
+# Seeded into an empty achievements table by migration 5 so existing badge names keep working
+DEFAULT_ACHIEVEMENTS = (
+    AchievementRule("First Vote", "votes", 1),
+    AchievementRule("10 Votes", "votes", 10),
+    AchievementRule("50 Votes", "votes", 50),
+    AchievementRule("First Submission", "submissions", 1),
+    AchievementRule("10 Submissions", "submissions", 10),
+    AchievementRule("50 Submissions", "submissions", 50),
+    AchievementRule("First Post", "approved", 1),
+    AchievementRule("10 Posts", "approved", 10),
+    AchievementRule("50 Posts", "approved", 50),
+)
+
+# Position of each category's counter in the get_user_stats() tuple
+CATEGORY_INDEX = {"votes": 0, "submissions": 1, "approved": 2}
+
+_rules = None
+_rules_lock = threading.Lock()
+
+
+def load_rules():
+    """Return the cached achievement rules, reading the table on first use."""
+    global _rules
+    if _rules is None:
+        with _rules_lock:
+            if _rules is None:
+                rows = db.session.execute(
+                    select(Achievement.name, Achievement.category, Achievement.threshold)
+                    .order_by(Achievement.id)
+                ).all()
+                _rules = tuple(AchievementRule(*row) for row in rows if row[1] in CATEGORY_INDEX)
+    return _rules
+
+
+def invalidate_rules():
+    """Drop the cached rules so the next evaluation re-reads the achievements table."""
+    global _rules
+    with _rules_lock:
+        _rules = None
+
+
+def earned_rules(stats):
+    """Rules whose threshold the given (votes, submissions, approved) counters meet."""
+    return [r for r in load_rules() if stats[CATEGORY_INDEX[r.category]] >= r.threshold]
+
+
+def evaluate_achievements(user_id):
+    """Award every badge the user has newly qualified for; returns the awarded badge names."""
+    # Role comes from the request's / cached identity, so this costs only the stats lookup
+    identity = get_identity(user_id)
+    if identity is None or identity.role == 'admin':
+        return []
+    stats = get_user_stats(user_id)
+
+    candidates = [r.name for r in earned_rules(stats)]
+    if not candidates:
+        return []
+    held = set(db.session.execute(
+        select(UserBadge.badge_name).where(UserBadge.user_id == user_id, UserBadge.badge_name.in_(candidates))
+    ).scalars())
+    new = [name for name in candidates if name not in held]
+    if new:
+        now = datetime.now(timezone.utc)
+        db.session.execute(insert_ignore(UserBadge),
+                           [{"user_id": user_id, "badge_name": name, "awarded_at": now} for name in new])
+        db.session.commit()
+    return new
+
+
+def _emoji_for_threshold(threshold: int):
+    if threshold >= 50:
+        return "🥇"
+    if threshold >= 10:
+        return "🥈"
+    return "🥉"
+
+
+def get_badge_catalog(user_id: int):
+    """Return a catalog of all badges with earned flag and progress for the given user."""
+    stats = get_user_stats(user_id)
+    awarded = dict(db.session.execute(
+        select(UserBadge.badge_name, UserBadge.awarded_at).where(UserBadge.user_id == user_id)
+    ).all())
+    return build_badge_catalog(stats, awarded)
+
+
+def build_badge_catalog(stats, awarded):
+    """Catalog entries from a stats tuple and a {badge_name: awarded_at} map of earned badges."""
+    catalog = []
+    for rule in load_rules():
+        catalog.append({
+            "name": rule.name,
+            "category": rule.category,
+            "threshold": rule.threshold,
+            "current": min(stats[CATEGORY_INDEX[rule.category]], rule.threshold),
+            "earned": rule.name in awarded,
+            "awarded_at": awarded.get(rule.name),
+            "emoji": _emoji_for_threshold(rule.threshold)
+        })
+    return catalog
+
+
+def _recompute_stats(user_ids):
+    """Reset the users' UserStats counters from their history, creating any missing rows.
+
+    Rows are updated in place rather than rebuilt, so events landing while the
+    backfill runs still find a row, and each counter is recounted by the UPDATE
+    itself, at the moment it is written.
+    """
+    db.session.execute(insert_ignore(UserStats), [
+        {"user_id": user_id, "vote_count": 0, "submission_count": 0, "approved_count": 0} for user_id in user_ids])
+    posts_by = select(func.count()).select_from(Post).where(Post.created_by == UserStats.user_id)
+    db.session.execute(
+        update(UserStats).where(UserStats.user_id.in_(user_ids)).values(
+            vote_count=select(func.count()).select_from(UserVote)
+                       .where(UserVote.user_id == UserStats.user_id).scalar_subquery(),
+            submission_count=posts_by.scalar_subquery(),
+            approved_count=posts_by.where(Post.status == 'Approved').scalar_subquery(),
+        ),
+        execution_options={"synchronize_session": False},
+    )
+    return db.session.execute(
+        select(UserStats.user_id, UserStats.vote_count, UserStats.submission_count, UserStats.approved_count)
+        .where(UserStats.user_id.in_(user_ids))
+    ).all()
+
+
+def backfill_badges(chunk_size=5000, report=print):
+    """Recompute every user's counters from history and insert any badges they are missing.
+
+    Users are processed in chunks of ``chunk_size``, each in one transaction:
+    their UserStats rows are recounted in place (see _recompute_stats) and the
+    UserBadge rows their counters now earn are inserted. Progress is passed to
+    ``report`` as it goes. Returns (users processed, badges inserted).
+    """
+    started = time.perf_counter()
+    invalidate_rules()
+    rules = load_rules()
+    users = db.session.execute(select(User.id, User.role).order_by(User.id)).all()
+    report(f"Recomputing counters and badges for {len(users)} users against {len(rules)} rules")
+
+    processed = inserted = 0
+    for start in range(0, len(users), chunk_size):
+        chunk = users[start:start + chunk_size]
+        ids = [user_id for user_id, _ in chunk]
+        admins = {user_id for user_id, role in chunk if role == 'admin'}
+        held = set(db.session.execute(
+            select(UserBadge.user_id, UserBadge.badge_name).where(UserBadge.user_id.in_(ids))).all())
+        now = datetime.now(timezone.utc)
+        badge_rows = []
+        for user_id, *counts in _recompute_stats(ids):
+            if user_id in admins:
+                continue
+            for rule in rules:
+                if counts[CATEGORY_INDEX[rule.category]] >= rule.threshold and (user_id, rule.name) not in held:
+                    badge_rows.append({"user_id": user_id, "badge_name": rule.name, "awarded_at": now})
+        if badge_rows:
+            db.session.execute(insert_ignore(UserBadge), badge_rows)
+            inserted += len(badge_rows)
+        db.session.commit()
+        processed += len(chunk)
+        elapsed = time.perf_counter() - started
+        report(f"{processed}/{len(users)} users, {inserted} badges inserted "
+               f"({processed / elapsed:,.0f} users/s)")
+    return processed, inserted
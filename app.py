@@ -3,9 +3,23 @@
 # from gevent import monkey
 # monkey.patch_all()
 import os
+import time
+import click
 from flask import Flask
+from flask.cli import AppGroup
+from werkzeug.middleware.proxy_fix import ProxyFix
 # from routes import routes_blueprint (<<< got an error here, commented for now -Khanh)
 from extensions import db, socketio, jwt, cors
+from votes import vote_buffer
+from feed_cache import feed_cache
+from websockets import register_websocket_handlers
+from unix_queue import UnixSocketManager
+from presence import presence
+from suggest import suggestions
+from passwords import passwords
+from login_throttle import login_throttle
+from current_user import identity_cache
+from migrations import check_schema, migrate
 
 
 # Try to import the Config class from config.py (only if it exists)
@@ -16,7 +30,52 @@ except ImportError:
     print("config.py not found. Falling back to environment variables.")
     config_available = False
 
+# Maintenance commands, e.g. `flask --app app badges recompute`
+badges_cli = AppGroup('badges', help='Badge maintenance commands.')
+
+@badges_cli.command('recompute')
+@click.option('--chunk-size', default=5000, show_default=True, help='Rows written per batch.')
+def recompute_badges(chunk_size):
+    """Recompute user stats from history and award any missing badges."""
+    from achievements import backfill_badges
+    users, badges = backfill_badges(chunk_size=chunk_size, report=click.echo)
+    click.echo(f"Done: {users} users checked, {badges} badges awarded.")
+
+users_cli = AppGroup('users', help='User account commands.')
+
+@users_cli.command('import')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--chunk-size', default=500, show_default=True, help='Users hashed and inserted per batch.')
+def import_users_command(path, chunk_size):
+    """Create users from a CSV or JSON file (including the legacy Archive/admin_backend/users.json)."""
+    import json
+    from user_import import parse_records, import_users
+    with open(path, 'rb') as f:
+        records = parse_records(f.read(), path)
+    for result in import_users(records, chunk_size=chunk_size):
+        click.echo(json.dumps(result))
+
+@click.command('migrate')
+def migrate_command():
+    """Apply pending database schema migrations."""
+    from extensions import db
+    migrate(db.engine, report=click.echo)
+
+def _default_async_mode():
+    """gevent inside a monkey-patched process (the gunicorn gevent worker), threading otherwise.
+
+    Flask-SocketIO's own detection picks gevent whenever it is installed, but
+    without the patches its background tasks, such as the coalesced post_counts
+    flush, never get to run.
+    """
+    try:
+        from gevent import monkey
+    except ImportError:
+        return 'threading'
+    return 'gevent' if monkey.is_module_patched('socket') else 'threading'
+
 def create_app():
+    started = time.perf_counter()
     app = Flask(__name__)
 
     # If config.py is available, use it. Otherwise, rely on environment variables.
@@ -29,6 +88,59 @@ def create_app():
         app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = os.getenv('SQLALCHEMY_TRACK_MODIFICATIONS', False)
         app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'default-secret-key')
 
+    # Optional write-behind buffering of vote counters (see votes.VoteCounterBuffer)
+    app.config['VOTE_WRITE_BEHIND'] = os.getenv('VOTE_WRITE_BEHIND', 'false').lower() in ('1', 'true', 'yes')
+    app.config['VOTE_FLUSH_INTERVAL'] = float(os.getenv('VOTE_FLUSH_INTERVAL', 2.0))
+    app.config['VOTE_FLUSH_MAX_PENDING'] = int(os.getenv('VOTE_FLUSH_MAX_PENDING', 500))
+
+    # Approved-feed cache (see feed_cache.FeedCache)
+    app.config['FEED_CACHE_ENABLED'] = os.getenv('FEED_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    app.config['FEED_CACHE_TTL'] = float(os.getenv('FEED_CACHE_TTL', 10.0))
+    app.config['FEED_CACHE_SIZE'] = int(os.getenv('FEED_CACHE_SIZE', 128))
+
+    # Live feed over Socket.IO (see websockets.py)
+    app.config['SOCKETIO_ASYNC_MODE'] = os.getenv('SOCKETIO_ASYNC_MODE') or _default_async_mode()
+    app.config['SOCKETIO_COALESCE_WINDOW'] = float(os.getenv('SOCKETIO_COALESCE_WINDOW', 0.25))
+    # Needed when running several workers so an emit reaches clients on all of them,
+    # e.g. unix:///dev/shm/insightboard-sio (single host) or redis://host:6379/0
+    app.config['SOCKETIO_MESSAGE_QUEUE'] = os.getenv('SOCKETIO_MESSAGE_QUEUE')
+    # Where workers share their connection counts; defaults to the unix queue's directory
+    queue_url = app.config['SOCKETIO_MESSAGE_QUEUE'] or ''
+    app.config['PRESENCE_DIR'] = os.getenv('PRESENCE_DIR', queue_url[len('unix://'):] if queue_url.startswith('unix://') else None)
+    app.config['PRESENCE_REFRESH_INTERVAL'] = float(os.getenv('PRESENCE_REFRESH_INTERVAL', 5.0))
+
+    # Admin keyword search: "auto" uses the database's full-text index when present (see search.py)
+    app.config['SEARCH_BACKEND'] = os.getenv('SEARCH_BACKEND', 'auto')
+    # In-memory search-as-you-type index (see suggest.py)
+    app.config['SUGGEST_INDEX_ENABLED'] = os.getenv('SUGGEST_INDEX_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    app.config['SUGGEST_REFRESH_INTERVAL'] = float(os.getenv('SUGGEST_REFRESH_INTERVAL', 2.0))
+
+    # Password hashing (see passwords.py); existing hashes are upgraded on login when this changes
+    app.config['PASSWORD_HASH_METHOD'] = os.getenv('PASSWORD_HASH_METHOD', 'pbkdf2:sha256')
+    app.config['PASSWORD_HASH_WORKERS'] = int(os.getenv('PASSWORD_HASH_WORKERS', 4))
+
+    # Failed-login limits (see login_throttle.py); only the resulting lock is written to the DB
+    app.config['LOGIN_THROTTLE_ENABLED'] = os.getenv('LOGIN_THROTTLE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    app.config['LOGIN_MAX_FAILURES'] = int(os.getenv('LOGIN_MAX_FAILURES', 3))
+    app.config['LOGIN_IP_MAX_FAILURES'] = int(os.getenv('LOGIN_IP_MAX_FAILURES', 20))
+    app.config['LOGIN_THROTTLE_WINDOW'] = float(os.getenv('LOGIN_THROTTLE_WINDOW', 300))
+    app.config['LOGIN_LOCK_SECONDS'] = float(os.getenv('LOGIN_LOCK_SECONDS', 300))
+    # Reverse proxies in front of the app whose X-Forwarded-For to trust, so the per-IP limit
+    # sees client addresses rather than the proxy's. Leave at 0 when clients connect directly,
+    # or they could pick their own address.
+    app.config['PROXY_FIX_X_FOR'] = int(os.getenv('PROXY_FIX_X_FOR', 0))
+
+    # Seconds a user's role/name stay cached between requests (see current_user.py); 0 disables
+    app.config['USER_CACHE_TTL'] = float(os.getenv('USER_CACHE_TTL', 60))
+
+    # Boot only reads the schema version; `flask --app app migrate` applies changes (see migrations.py).
+    # Local SQLite databases are migrated automatically, as db.create_all() used to do.
+    auto_migrate_default = 'true' if app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite') else 'false'
+    app.config['SCHEMA_AUTO_MIGRATE'] = os.getenv('SCHEMA_AUTO_MIGRATE', auto_migrate_default).lower() in ('1', 'true', 'yes')
+
+    if app.config['PROXY_FIX_X_FOR']:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_FIX_X_FOR'])
+
     # Add MySQL connection pooling and timeout settings
     if 'mysql' in app.config['SQLALCHEMY_DATABASE_URI']:
         app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
@@ -46,17 +158,37 @@ def create_app():
     db.init_app(app)
     jwt.init_app(app)
     cors.init_app(app)
-    # socketio.init_app(app, async_mode='gevent')  # Optional, only if using websockets
+    socketio_options = {}
+    queue_url = app.config['SOCKETIO_MESSAGE_QUEUE']
+    if queue_url and queue_url.startswith('unix://'):
+        # Fan out between the workers on this host (see unix_queue.py)
+        socketio_options['client_manager'] = UnixSocketManager(queue_url)
+    elif queue_url:
+        socketio_options['message_queue'] = queue_url  # e.g. redis://, handled by Flask-SocketIO
+    socketio.init_app(app, async_mode=app.config['SOCKETIO_ASYNC_MODE'], **socketio_options)
+    register_websocket_handlers(socketio, coalesce_window=app.config['SOCKETIO_COALESCE_WINDOW'])
+    presence.init_app(app, socketio)
+    vote_buffer.init_app(app)
+    feed_cache.init_app(app)
+    passwords.init_app(app)
+    login_throttle.init_app(app)
+    identity_cache.init_app(app)
 
     # Import and register blueprints here (inside app context)
     from auth_routes import auth_bp
     from routes import routes_bp
     app.register_blueprint(auth_bp)
     app.register_blueprint(routes_bp)
+    app.cli.add_command(badges_cli)
+    app.cli.add_command(users_cli)
+    app.cli.add_command(migrate_command)
 
     with app.app_context():
-        db.create_all()
+        schema_ready = check_schema(app)
+    if schema_ready:
+        suggestions.init_app(app)  # indexes the posts table in a background task
 
+    app.logger.info("App ready in %.3fs", time.perf_counter() - started)
     return app
 
 # Create the app instance
@@ -1,13 +1,15 @@
-from flask import Blueprint, request, render_template, redirect, url_for, flash, session, jsonify
-from werkzeug.security import generate_password_hash, check_password_hash
-from model import User, Post, PostReport, UserVote, UserBadge
+from flask import Blueprint, request, render_template, redirect, url_for, flash, session, jsonify, Response, stream_with_context
+from passwords import passwords
+from login_throttle import login_throttle
+from user_import import parse_records, import_users
+from current_user import Identity, identity_cache
+from model import User, Post
 from extensions import db
+from votes import vote_buffer
+from dashboard import load_dashboard
 from datetime import datetime, timedelta, timezone
-import random
-import string
+import json
 
-def generate_password(length=10):
-    return ''.join(random.choices(string.ascii_letters + string.digits, k=length))
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -36,7 +38,7 @@ def create_account():
     new_user = User(
         name=f"{first_name} {last_name}",  
         email=email,
-        password=generate_password_hash(password, method='pbkdf2:sha256'),
+        password=passwords.hash(password),
         role=role
     )
 
@@ -48,6 +50,28 @@ def create_account():
         "message": f"Account for {email} created! Temporary password: {password}"
     })
 
+# Bulk-create users from an uploaded CSV/JSON file (or a JSON body), streaming one NDJSON result per row
+@auth_bp.route('/admin/import-users', methods=['POST'])
+def import_users_route():
+    if session.get('user_role') != 'admin':
+        return jsonify({"status": "error", "message": "Unauthorized"}), 403
+
+    upload = request.files.get('file')
+    try:
+        if upload:
+            records = parse_records(upload.read(), upload.filename or "")
+        else:
+            records = parse_records(request.get_data())
+    except (ValueError, UnicodeDecodeError) as e:
+        return jsonify({"status": "error", "message": f"Could not read import: {e}"}), 400
+    if not records:
+        return jsonify({"status": "error", "message": "No users to import"}), 400
+
+    chunk_size = request.args.get('chunk_size', 500, type=int)
+    results = import_users(records, chunk_size=max(1, min(chunk_size, 5000)))
+    return Response(stream_with_context(json.dumps(r) + "\n" for r in results),
+                    mimetype='application/x-ndjson')
+
 # Show login form
 @auth_bp.route('/login', methods=['GET'])
 def login_page():
@@ -58,39 +82,52 @@ def login_page():
 def login():
     email = request.form['email']
     password = request.form['password']
+    client_ip = request.remote_addr
+
+    # Over-limit attempts are refused before any query or hash (see login_throttle.py)
+    if login_throttle.blocked(email, client_ip):
+        flash('Too many failed attempts. Try again later.', 'danger')
+        return redirect(url_for('auth.login_page'))
+
     user = User.query.filter_by(email=email).first()
 
     if not user:
+        login_throttle.record_failure(email, client_ip)
         flash('Invalid credentials', 'danger')
         return redirect(url_for('auth.login_page'))
 
-    if user.locked_until and user.locked_until > datetime.utcnow():
+    if user.locked_until and user.locked_until > datetime.now(timezone.utc):
         flash('Account locked. Try again later.', 'danger')
         return redirect(url_for('auth.login_page'))
 
-    if not check_password_hash(user.password, password):
-        if user.failed_attempts is None:
-            user.failed_attempts = 0
-        user.failed_attempts += 1
-        if user.failed_attempts >= 3:
-            user.locked_until = datetime.utcnow() + timedelta(minutes=5)
-            flash('Too many failed attempts. Locked for 5 minutes.', 'danger')
+    if not passwords.verify(user.password, password):
+        if login_throttle.record_failure(email, client_ip):
+            # The only write a failed login makes: the lock, so every worker honours it
+            user.failed_attempts = login_throttle.max_failures
+            user.locked_until = datetime.now(timezone.utc) + timedelta(seconds=login_throttle.lock_seconds)
+            db.session.commit()
+            flash(f'Too many failed attempts. Locked for {int(login_throttle.lock_seconds // 60)} minutes.', 'danger')
         else:
             flash('Invalid password', 'danger')
-        db.session.commit()
         return redirect(url_for('auth.login_page'))
 
 
     # Successful login
     session['user_id'] = user.id
     session['user_role'] = user.role
+    identity_cache.put(Identity(user.id, user.role, user.name))
 
     name_parts = user.name.split(' ', 1)
     session['first_name'] = name_parts[0] if name_parts else 'User'
     session['last_name'] = name_parts[1] if len(name_parts) > 1 else ''
     
-    user.failed_attempts = 0
-    user.locked_until = None
+    login_throttle.record_success(email)
+    if user.failed_attempts or user.locked_until:
+        user.failed_attempts = 0
+        user.locked_until = None
+    # Upgrade hashes made with an older method or cost while we have the plain password
+    if passwords.needs_rehash(user.password):
+        user.password = passwords.hash(password)
     db.session.commit()
 
     if user.role == 'admin':
@@ -106,38 +143,21 @@ def user_dashboard():
     
     user_id = session["user_id"]
     user_role = session.get("user_role")
-    user = User.query.get(user_id)
-
-    # Get all approved posts for the feed (not just user's own)
-    feed_posts = Post.query.filter(Post.status.in_(["Approved", "admin"]))\
-                          .order_by(Post.upvotes.desc()).all()
-    
-    for post in feed_posts:
-        if post.submitted_at and post.submitted_at.tzinfo is None:
-            post.submitted_at = post.submitted_at.replace(tzinfo=timezone.utc)
-        if post.reviewed_at and post.reviewed_at.tzinfo is None:
-            post.reviewed_at = post.reviewed_at.replace(tzinfo=timezone.utc)
-    
-    # Get posts this user has reported
-    reported_posts = []
-    if user_id:
-        reported_posts = [r.post_id for r in PostReport.query.filter_by(reported_by=user_id).all()]
-    
-    user_votes = UserVote.query.filter_by(user_id=user_id).all()
-    user_vote_map = {v.post_id: v.vote_type for v in user_votes}
+    data = load_dashboard(user_id)
+    if data is None:
+        session.clear()
+        return redirect(url_for('auth.login_page'))
 
-    badges = UserBadge.query.filter_by(user_id=user_id).all()
+    # Feed rows carry this user's vote and report flag (see dashboard.py)
     context = {
-        "feed_posts": feed_posts,
-        "reported_ids": reported_posts,
-        "user_vote_map": user_vote_map,
-        "user_points": user.points,
+        "feed_posts": data.feed,
+        "user_points": max(0, data.points + (vote_buffer.pending_for_user(user_id) if vote_buffer.enabled else 0)),
+        "pending_votes": vote_buffer.pending_posts() if vote_buffer.enabled else {},
         "show_report_count": (user_role == "admin"),
     }
 
     if user_role != 'admin':
-        from routes import get_badge_catalog 
-        catalog = get_badge_catalog(user_id)
+        catalog = data.badge_catalog
         recent = sorted(
             [b for b in catalog if b["earned"]],
             key=lambda x: x.get("awarded_at") or datetime.min.replace(tzinfo=timezone.utc),
@@ -150,10 +170,6 @@ def user_dashboard():
             latest_award = recent[0].get("awarded_at")
             if latest_award:
                 now = datetime.now(timezone.utc)
-
-                if latest_award.tzinfo is None:
-                    latest_award = latest_award.replace(tzinfo=timezone.utc)
-
                 unlocked = (now - latest_award).total_seconds() < 10
         context.update({
             "badges": catalog,
@@ -182,12 +198,6 @@ def my_posts():
     pending_posts = Post.query.filter_by(created_by=user_id, status="Pending").order_by(Post.submitted_at.desc()).all()
     declined_posts = Post.query.filter_by(created_by=user_id, status="Declined").order_by(Post.submitted_at.desc()).all()
 
-    for post in user_approved_posts + pending_posts + declined_posts:
-        if post.submitted_at and post.submitted_at.tzinfo is None:
-            post.submitted_at = post.submitted_at.replace(tzinfo=timezone.utc)
-        if post.reviewed_at and post.reviewed_at.tzinfo is None:
-            post.reviewed_at = post.reviewed_at.replace(tzinfo=timezone.utc)
-    
     return render_template("my_posts.html", 
                          approved_posts=user_approved_posts,
                          pending_posts=pending_posts,
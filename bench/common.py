@@ -0,0 +1,95 @@
+# Description: shared setup for the benchmark scripts in this directory. Each
+# script builds an app on a throwaway SQLite database, seeds it with bulk
+# inserts and times requests through the Flask test client, so the numbers
+# cover routing, queries and rendering but not the network.
+#
+#   python bench/<script>.py --help
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+# app.py builds an app at import time; keep it off the real database
+os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "import.db")
+os.environ.setdefault("SUGGEST_INDEX_ENABLED", "false")
+os.environ.setdefault("SECRET_KEY", "bench-secret-key-that-is-long-enough-for-hs256")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event, insert
+from werkzeug.security import generate_password_hash
+from app import create_app
+from extensions import db
+from model import User, Post
+
+PASSWORD = "bench-password"
+
+
+def make_app(**env):
+    """A fresh app on its own SQLite file; ``env`` overrides config environment variables."""
+    os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+    for key, value in env.items():
+        os.environ[key] = str(value)
+    return create_app()
+
+
+def add_user(app, email, role="user", method="pbkdf2:sha256:1000"):
+    with app.app_context():
+        user = User(email=email, name=email.split("@")[0].title() + " Bench", role=role, points=0,
+                    password=generate_password_hash(PASSWORD, method=method))
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+
+def add_posts(app, n, author_id, content=lambda i: f"post {i} about the coffee machine on floor {i % 9}",
+              status=lambda i: "Approved" if i % 4 else "Pending", batch=10000):
+    """Bulk-insert ``n`` posts; ``content`` and ``status`` map the post number to a value."""
+    now = datetime.now(timezone.utc)
+    with app.app_context():
+        for start in range(0, n, batch):
+            db.session.execute(insert(Post), [
+                dict(content=content(i), category="HR", status=status(i), upvotes=i % 50, downvotes=0,
+                     report_count=0, created_by=author_id, created_at=now, submitted_at=now, reviewed_at=now)
+                for i in range(start, min(start + batch, n))])
+        db.session.commit()
+
+
+def login(app, user_id, role):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["user_id"] = user_id
+        session["user_role"] = role
+    return client
+
+
+class StatementCounter:
+    """Counts the statements an engine executes while active."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _count(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._count)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._count)
+
+
+def timed(fn, repeat=20, warmup=2):
+    """Run ``fn`` repeatedly; returns (median ms, min ms)."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), min(samples)
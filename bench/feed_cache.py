@@ -0,0 +1,31 @@
+# Description: feed endpoints with the feed cache on and off (FEED_CACHE_ENABLED).
+# Reports median latency and statements per request for a repeated read of the
+# same feed page and of the admin dashboard, which both read the cached feed.
+#
+#   python bench/feed_cache.py --posts 20000
+
+import argparse
+from common import make_app, add_user, add_posts, login, timed, StatementCounter
+from extensions import db
+
+
+def run(posts, enabled):
+    app = make_app(FEED_CACHE_ENABLED=str(enabled).lower())
+    admin_id = add_user(app, "admin@example.com", role="admin")
+    user_id = add_user(app, "user@example.com")
+    add_posts(app, posts, user_id)
+    clients = {"/api/approved_posts?limit=50": login(app, user_id, "user"), "/admin": login(app, admin_id, "admin")}
+    for url, client in clients.items():
+        median, best = timed(lambda: client.get(url))
+        with app.app_context(), StatementCounter(db.engine) as statements:
+            client.get(url)
+        print(f"cache {'on ' if enabled else 'off'}  {url:30} {median:8.2f} ms (min {best:.2f})  "
+              f"{statements.count} statements")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--posts", type=int, default=20000)
+    args = parser.parse_args()
+    for enabled in (False, True):
+        run(args.posts, enabled)
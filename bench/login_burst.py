@@ -0,0 +1,59 @@
+# Description: feed latency while a burst of logins is hashing passwords, under
+# gevent (as in the gunicorn gevent worker). With PASSWORD_HASH_WORKERS=0 every
+# hash runs on the event loop and stalls the feed readers; with a thread pool
+# only the logging-in greenlets wait. The number of feed requests served in the
+# window is the figure to watch: a stalled loop starts almost none.
+#
+#   python bench/login_burst.py --logins 8 --workers 0 4
+
+from gevent import monkey
+monkey.patch_all()
+
+import argparse
+import time
+import gevent
+from common import make_app, add_user, add_posts, PASSWORD
+from passwords import passwords
+
+
+def burst(app, logins, seconds=2.5, readers=5):
+    latencies = []
+
+    def read_feed():
+        client = app.test_client()
+        end = time.perf_counter() + seconds
+        while time.perf_counter() < end:
+            start = time.perf_counter()
+            client.get("/api/approved_posts")
+            latencies.append(time.perf_counter() - start)
+            gevent.sleep(0.005)
+
+    def login(i):
+        return app.test_client().post("/login", data={"email": f"user{i}@example.com", "password": PASSWORD}).status_code
+
+    greenlets = [gevent.spawn(read_feed) for _ in range(readers)] + [gevent.spawn(login, i) for i in range(logins)]
+    gevent.joinall(greenlets)
+    latencies.sort()
+    return latencies, [g.value for g in greenlets[readers:]]
+
+
+def main(logins, worker_counts):
+    app = make_app(LOGIN_THROTTLE_ENABLED="false")
+    for i in range(logins):
+        add_user(app, f"user{i}@example.com", method=passwords.method)
+    add_posts(app, 200, 1)
+    for workers in worker_counts:
+        passwords.workers = workers
+        latencies, statuses = burst(app, logins)
+        p = lambda q: latencies[min(int(len(latencies) * q), len(latencies) - 1)] * 1000
+        print(f"hash workers {workers}: {len(latencies):4d} feed requests  p50 {p(0.5):7.1f} ms  "
+              f"p99 {p(0.99):7.1f} ms  max {latencies[-1] * 1000:7.1f} ms  "
+              f"(login statuses {sorted(set(statuses))}, {passwords.method})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=8)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 4])
+    args = parser.parse_args()
+    main(args.logins, args.workers)
@@ -0,0 +1,49 @@
+# Description: loading a list page's posts as ORM entities against the
+# read-only PostRow tuples the list routes use (read_models.post_rows), plus
+# the end-to-end latency of those routes. Reports time and peak Python memory.
+#
+#   python bench/read_models.py --posts 20000
+
+import argparse
+import tracemalloc
+from common import make_app, add_user, add_posts, login, timed
+from extensions import db
+from model import Post
+from read_models import post_rows
+
+LOREM = "lorem ipsum dolor sit amet consectetur adipiscing elit " * 6
+
+
+def peak_mb(fn):
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1e6
+
+
+def main(posts):
+    app = make_app(FEED_CACHE_ENABLED="false")
+    admin_id = add_user(app, "admin@example.com", role="admin")
+    add_posts(app, posts, admin_id, content=lambda i: f"{i} {LOREM}",
+              status=lambda i: "Approved" if i % 4 else "Declined")
+
+    with app.app_context():
+        loaders = {
+            "ORM entities": lambda: (Post.query.filter(Post.status == "Approved").all(), db.session.expunge_all()),
+            "PostRow tuples": lambda: post_rows(Post.status == "Approved"),
+        }
+        for label, load in loaders.items():
+            median, best = timed(load, repeat=5, warmup=1)
+            print(f"{label:<16} {median:8.1f} ms (min {best:.1f})  peak {peak_mb(load):6.1f} MB")
+
+    client = login(app, admin_id, "admin")
+    for url in ("/admin/approved", "/admin/all"):
+        median, _ = timed(lambda: client.get(url), repeat=5, warmup=1)
+        print(f"GET {url:<16} {median:8.1f} ms  peak {peak_mb(lambda: client.get(url)):6.1f} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--posts", type=int, default=20000)
+    main(parser.parse_args().posts)
@@ -0,0 +1,47 @@
+# Description: admin keyword search (/admin/search-filter) at growing table
+# sizes, with the native index (FTS5 on SQLite) against the LIKE fallback.
+# Posts are random sentences from a fixed vocabulary, so "common" matches a
+# large share of the table and "rare" only a handful of posts.
+#
+#   python bench/search.py --sizes 10000 100000 1000000
+
+import argparse
+import random
+import time
+from common import make_app, add_user, add_posts, login, timed
+from search import search, LikeSearch, SqliteFtsSearch
+
+VOCABULARY = ("coffee printer parking meeting laptop badge window heating lunch wifi desk monitor "
+              "elevator kitchen schedule training payroll holiday badge chair noise light").split()
+KEYWORDS = {"common": "coffee", "rare": "zeppelin", "two words": "parking badge"}
+
+
+def content(i, rng=random.Random(42)):
+    words = rng.choices(VOCABULARY, k=rng.randint(8, 30))
+    if i % 5000 == 0:
+        words.append("zeppelin")
+    return " ".join(words)
+
+
+def run(size):
+    app = make_app()
+    admin_id = add_user(app, "admin@example.com", role="admin")
+    started = time.perf_counter()
+    add_posts(app, size, admin_id, content=content)
+    print(f"{size:>9,} posts seeded (FTS triggers included) in {time.perf_counter() - started:.1f}s")
+    client = login(app, admin_id, "admin")
+    for label, keyword in KEYWORDS.items():
+        row = []
+        for backend in (LikeSearch(), SqliteFtsSearch()):
+            search._backend = backend
+            median, _ = timed(lambda: client.get(f"/admin/search-filter?q={keyword}&status=All"), repeat=5, warmup=1)
+            row.append(f"{backend.name} {median:9.1f} ms")
+        print(f"          {label:<10} " + "   ".join(row))
+    search._backend = None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    for size in parser.parse_args().sizes:
+        run(size)
@@ -0,0 +1,51 @@
+# Description: cost of resolving the sender of a Socket.IO message. Identity is
+# resolved once at connect and cached per sid; this compares a burst of
+# send_message events against what the same burst costs when every event
+# decodes the JWT and loads the user row again (the per-event lookup it replaced).
+#
+#   python bench/socket_identity.py --messages 2000
+
+import argparse
+import os
+import time
+
+os.environ.setdefault("SOCKETIO_ASYNC_MODE", "threading")
+from common import make_app, add_user, StatementCounter
+from flask_jwt_extended import create_access_token, decode_token
+from extensions import db, socketio
+from model import User
+
+
+def main(messages):
+    app = make_app()
+    user_id = add_user(app, "user@example.com")
+    with app.app_context():
+        token = create_access_token(identity=str(user_id))
+    client = socketio.test_client(app, query_string=f"token={token}")
+    client.get_received()
+
+    with app.app_context(), StatementCounter(db.engine) as statements:
+        start = time.perf_counter()
+        for _ in range(messages):
+            client.emit("send_message", {"message": "hi"})
+        cached = time.perf_counter() - start
+    client.get_received()
+    print(f"cached identity   {messages} messages in {cached * 1000:8.1f} ms  "
+          f"({cached / messages * 1e6:6.1f} us each, {statements.count} statements)")
+
+    with app.test_request_context():
+        start = time.perf_counter()
+        for _ in range(messages):
+            claims = decode_token(token)
+            db.session.get(User, int(claims["sub"]))
+            db.session.expire_all()
+        lookup = time.perf_counter() - start
+    print(f"per-event lookup  {messages} lookups  in {lookup * 1000:8.1f} ms  "
+          f"({lookup / messages * 1e6:6.1f} us each, {messages} statements), on top of delivery")
+    client.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=2000)
+    main(parser.parse_args().messages)
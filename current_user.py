@@ -0,0 +1,88 @@
+# Description: one lookup of the logged-in user's identity per request.
+# load_current_user() memoises the user on flask.g, so every helper that runs
+# during a request (routes, badge checks) shares it instead of querying the
+# user row again. Underneath, role and name are kept in a short-TTL
+# cross-request cache; anything that changes (points, lock state) is always
+# read from the database by the code that needs it.
+
+import threading
+import time
+from collections import namedtuple
+from flask import g, session, has_app_context
+from sqlalchemy import select
+from extensions import db
+from model import User
+
+Identity = namedtuple("Identity", ["id", "role", "name"])
+
+
+class IdentityCache:
+    """user_id -> Identity with a TTL; role changes show up within ``ttl`` seconds.
+
+    Code that changes a user's role or name calls invalidate() so this process
+    sees it at once; other processes rely on the TTL.
+    """
+
+    def __init__(self, ttl=60.0, max_entries=10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}  # user_id -> (expires_at, Identity)
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.ttl = app.config.get('USER_CACHE_TTL', self.ttl)
+
+    def get(self, user_id):
+        if self.ttl <= 0:
+            return None
+        entry = self._entries.get(user_id)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        return entry[1]
+
+    def put(self, identity):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                now = time.monotonic()
+                self._entries = {k: v for k, v in self._entries.items() if v[0] > now}
+                if len(self._entries) >= self.max_entries:
+                    self._entries.clear()
+            self._entries[identity.id] = (time.monotonic() + self.ttl, identity)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+identity_cache = IdentityCache()
+
+
+def get_identity(user_id):
+    """Identity for ``user_id`` (None if no such user), from the request, the cache or one query."""
+    if user_id is None:
+        return None
+    current = g.get("current_user") if has_app_context() else None
+    if current is not None and current.id == user_id:
+        return current
+    identity = identity_cache.get(user_id)
+    if identity is None:
+        row = db.session.execute(select(User.role, User.name).where(User.id == user_id)).one_or_none()
+        if row is None:
+            return None
+        identity = Identity(user_id, row.role, row.name)
+        identity_cache.put(identity)
+    return identity
+
+
+def load_current_user():
+    """The logged-in user's Identity, looked up at most once per request; None if logged out."""
+    if "current_user" not in g:
+        g.current_user = None  # set first so a missing user is not looked up again
+        g.current_user = get_identity(session.get("user_id"))
+    return g.current_user
@@ -0,0 +1,77 @@
+# Description: loads everything the user dashboard renders in two queries:
+#
+#   1. the user's role and points, their UserStats counters and their earned
+#      badges (User LEFT JOIN user_stats LEFT JOIN user_badge, one row per badge)
+#   2. this user's votes and reports (user_vote UNION ALL post_reports, both
+#      read through their user-leading indexes)
+#
+# The feed itself comes from the shared feed cache (feed_cache.load_approved_feed),
+# which costs a third query only on a miss; the per-user flags are joined onto
+# the cached rows here.
+#
+# Badge progress is computed from those rows and the cached rule set, so it
+# needs no query of its own. Only a user with no UserStats row yet costs extra
+# (it is seeded once, see user_stats.get_user_stats).
+
+from collections import namedtuple
+from sqlalchemy import select, union_all, literal, null
+from extensions import db
+from model import PostReport, UserVote, User, UserStats, UserBadge
+from read_models import PostRow
+from feed_cache import load_approved_feed
+from user_stats import get_user_stats
+from achievements import build_badge_catalog
+
+# A feed PostRow plus this user's vote ('upvote', 'downvote' or None) and report flag
+DashboardPost = namedtuple("DashboardPost", PostRow._fields + ("my_vote", "reported"))
+
+DashboardData = namedtuple("DashboardData", ["role", "points", "stats", "badge_catalog", "feed"])
+
+
+def _load_profile(user_id):
+    rows = db.session.execute(
+        select(User.role, User.points,
+               UserStats.vote_count, UserStats.submission_count, UserStats.approved_count,
+               UserBadge.badge_name, UserBadge.awarded_at)
+        .outerjoin(UserStats, UserStats.user_id == User.id)
+        .outerjoin(UserBadge, UserBadge.user_id == User.id)
+        .where(User.id == user_id)
+    ).all()
+    if not rows:
+        return None
+    first = rows[0]
+    stats = (first.vote_count, first.submission_count, first.approved_count) \
+        if first.vote_count is not None else get_user_stats(user_id)
+    awarded = {r.badge_name: r.awarded_at for r in rows if r.badge_name is not None}
+    return first.role, first.points or 0, stats, awarded
+
+
+def _load_flags(user_id):
+    """({post id: 'upvote'/'downvote'}, {reported post ids}) for the user, in one round trip."""
+    rows = db.session.execute(union_all(
+        select(UserVote.post_id, UserVote.vote_type, literal(False).label("reported"))
+        .where(UserVote.user_id == user_id),
+        select(PostReport.post_id, null(), literal(True)).where(PostReport.reported_by == user_id),
+    ))
+    votes, reported = {}, set()
+    for post_id, vote_type, is_report in rows:
+        if is_report:
+            reported.add(post_id)
+        else:
+            votes[post_id] = vote_type
+    return votes, reported
+
+
+def _load_feed(user_id):
+    votes, reported = _load_flags(user_id)
+    return [DashboardPost(*row, votes.get(row.id), row.id in reported) for row in load_approved_feed()]
+
+
+def load_dashboard(user_id):
+    """Everything user_dashboard renders, or None if the user no longer exists."""
+    profile = _load_profile(user_id)
+    if profile is None:
+        return None
+    role, points, stats, awarded = profile
+    catalog = build_badge_catalog(stats, awarded) if role != 'admin' else []
+    return DashboardData(role, points, stats, catalog, _load_feed(user_id))
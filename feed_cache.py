@@ -0,0 +1,122 @@
+# Description: in-process cache for the approved feed ("Approved or admin
+# posts ordered by upvotes"), shared by the feed API and both dashboards.
+#
+# Entries are keyed by a feed version that is bumped whenever something that
+# changes the feed happens (approve/decline, admin post, vote, report), so a
+# bump invalidates everything at once. Entries are also bounded by an LRU size
+# and a TTL; the TTL limits how long another gunicorn worker's changes, which
+# do not bump this process's version, can go unseen.
+
+import heapq
+import threading
+import time
+from collections import OrderedDict
+from itertools import groupby, islice
+from operator import attrgetter
+from sqlalchemy import and_, or_
+from model import Post
+from read_models import post_rows
+
+FEED_STATUSES = ["Approved", "admin"]
+FEED_ORDER = (Post.upvotes.desc(), Post.id.desc())
+# Index order of ix_posts_status_upvotes, which merge_feed turns into FEED_ORDER
+FEED_SCAN_ORDER = (Post.status.desc(),) + FEED_ORDER
+
+
+class FeedCache:
+    """Version-stamped LRU/TTL cache with hit/miss counters."""
+
+    def __init__(self, max_entries=128, ttl=10.0):
+        self.enabled = True
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # (version, key) -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.enabled = app.config.get('FEED_CACHE_ENABLED', True)
+        self.ttl = app.config.get('FEED_CACHE_TTL', self.ttl)
+        self.max_entries = app.config.get('FEED_CACHE_SIZE', self.max_entries)
+
+    def bump(self):
+        """Invalidate every cached feed entry."""
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+
+    def get_or_load(self, key, loader):
+        """Return the cached value for ``key`` at the current version, calling ``loader`` on a miss."""
+        if not self.enabled:
+            return loader()
+        now = time.monotonic()
+        with self._lock:
+            version = self.version
+            entry = self._entries.get((version, key))
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end((version, key))
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        value = loader()
+        with self._lock:
+            # Don't store a result that was loaded across a bump; it may predate the change
+            if version == self.version:
+                self._entries[(version, key)] = (now + self.ttl, value)
+                self._entries.move_to_end((version, key))
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return value
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "version": self.version,
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            }
+
+
+feed_cache = FeedCache()
+
+
+def merge_feed(rows, limit=None):
+    """Merge rows grouped by status, each group already in FEED_ORDER, into one feed-ordered list."""
+    groups = [list(group) for _, group in groupby(rows, key=attrgetter("status"))]
+    merged = heapq.merge(*groups, key=lambda row: (row.upvotes, row.id), reverse=True)
+    return list(islice(merged, limit))
+
+
+def feed_rows(after=None, limit=None):
+    """Feed PostRows in FEED_ORDER, starting after the (upvotes, id) position ``after``.
+
+    ORDER BY upvotes over a status IN (...) filter makes the database read two
+    ranges of ix_posts_status_upvotes and sort their union. Within one status
+    the index entries (which end in the primary key) are already in
+    (upvotes, id) order, so the feed is read in index order and the per-status
+    runs are merged here: one seek of ``limit`` rows per status for a page, or
+    a single scan ordered by (status, upvotes, id) for the whole feed.
+    """
+    criteria = []
+    if after:
+        last_upvotes, last_id = after
+        criteria.append(or_(Post.upvotes < last_upvotes,
+                            and_(Post.upvotes == last_upvotes, Post.id < last_id)))
+    if limit is None:
+        rows = post_rows(Post.status.in_(FEED_STATUSES), *criteria, order_by=FEED_SCAN_ORDER)
+    else:
+        rows = [row for status in FEED_STATUSES
+                for row in post_rows(Post.status == status, *criteria, order_by=FEED_ORDER, limit=limit)]
+    return merge_feed(rows, limit)
+
+
+def load_approved_feed():
+    """The whole approved feed as PostRows, served from the cache when possible."""
+    return feed_cache.get_or_load(("feed",), lambda: tuple(feed_rows()))
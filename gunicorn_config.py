@@ -1,2 +1,15 @@
-bind = "0.0.0.0:8080"
-workers = 2
\ No newline at end of file
+import os
+
+# The platform router assigns $PORT (see Procfile)
+bind = f"0.0.0.0:{os.getenv('PORT', '8080')}"
+workers = 2
+
+# With more than one worker, Socket.IO emits have to be fanned out between them.
+# The platform router is one proxy hop in front of gunicorn (see PROXY_FIX_X_FOR).
+raw_env = ["SOCKETIO_MESSAGE_QUEUE=unix:///dev/shm/insightboard-sio", "PROXY_FIX_X_FOR=1"]
+
+
+def worker_exit(server, worker):
+    # Flush any vote counter deltas still held by the write-behind buffer
+    from votes import vote_buffer
+    vote_buffer.shutdown()
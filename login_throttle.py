@@ -0,0 +1,137 @@
+# Description: in-memory login throttle. Failed attempts are counted per
+# email and per client IP in sliding windows, so a credential-stuffing burst
+# is turned away before it reaches the database or the password hash.
+#
+# The only database write is the lock itself: when an email reaches
+# max_failures inside the window, login() stores locked_until on the user row,
+# which every worker honours. Counting is per worker process (there are two),
+# so an attacker spread across workers gets at most max_failures per worker
+# before that lock lands.
+
+import threading
+import time
+
+
+class SlidingWindowCounter:
+    """Approximate sliding-window event counts per key.
+
+    Each key keeps just [window index, previous window's count, current
+    window's count]; the previous count is weighted by how much of it still
+    overlaps the sliding window. Keys idle for two windows are pruned.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self._entries = {}
+        self._ops = 0
+
+    def _position(self, now):
+        index, offset = divmod(now, self.window)
+        return int(index), offset / self.window
+
+    def count(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return 0.0
+        index, elapsed = self._position(now)
+        bucket, previous, current = entry
+        if bucket == index:
+            return previous * (1 - elapsed) + current
+        if bucket == index - 1:
+            return current * (1 - elapsed)
+        return 0.0
+
+    def hit(self, key, now):
+        """Record one event and return the key's count including it."""
+        index, _ = self._position(now)
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < index - 1:
+            self._entries[key] = [index, 0, 1]
+        elif entry[0] == index - 1:
+            self._entries[key] = [index, entry[2], 1]
+        else:
+            entry[2] += 1
+        self._ops += 1
+        if self._ops % 1024 == 0:
+            self._prune(index)
+        return self.count(key, now)
+
+    def reset(self, key):
+        self._entries.pop(key, None)
+
+    def _prune(self, index):
+        for key in [k for k, e in self._entries.items() if e[0] < index - 1]:
+            del self._entries[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class LoginThrottle:
+    """Failed-login limits per email (leads to a lock) and per client IP (temporary block)."""
+
+    def __init__(self, max_failures=3, ip_max_failures=20, window=300.0, lock_seconds=300.0):
+        self.enabled = True
+        self.max_failures = max_failures
+        self.ip_max_failures = ip_max_failures
+        self.lock_seconds = lock_seconds
+        self._by_email = SlidingWindowCounter(window)
+        self._by_ip = SlidingWindowCounter(window)
+        self._locked = {}  # email -> monotonic time the lock ends
+        self._failures = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.enabled = app.config.get('LOGIN_THROTTLE_ENABLED', True)
+        self.max_failures = app.config.get('LOGIN_MAX_FAILURES', self.max_failures)
+        self.ip_max_failures = app.config.get('LOGIN_IP_MAX_FAILURES', self.ip_max_failures)
+        self.lock_seconds = app.config.get('LOGIN_LOCK_SECONDS', self.lock_seconds)
+        window = app.config.get('LOGIN_THROTTLE_WINDOW', self._by_email.window)
+        self._by_email = SlidingWindowCounter(window)
+        self._by_ip = SlidingWindowCounter(window)
+        self._locked = {}
+
+    @staticmethod
+    def _email_key(email):
+        return (email or "").strip().lower()
+
+    def blocked(self, email, ip):
+        """True if this attempt should be refused without looking anything up."""
+        if not self.enabled:
+            return False
+        now = time.monotonic()
+        key = self._email_key(email)
+        with self._lock:
+            until = self._locked.get(key)
+            if until is not None:
+                if until > now:
+                    return True
+                del self._locked[key]
+            return self._by_ip.count(ip, now) >= self.ip_max_failures
+
+    def record_failure(self, email, ip):
+        """Count a failed attempt; returns True when it starts a lock on ``email``."""
+        if not self.enabled:
+            return False
+        now = time.monotonic()
+        key = self._email_key(email)
+        with self._lock:
+            self._by_ip.hit(ip, now)
+            self._failures += 1
+            if self._failures % 1024 == 0:
+                self._locked = {k: until for k, until in self._locked.items() if until > now}
+            if self._by_email.hit(key, now) < self.max_failures:
+                return False
+            self._locked[key] = now + self.lock_seconds
+            self._by_email.reset(key)
+            return True
+
+    def record_success(self, email):
+        with self._lock:
+            self._by_email.reset(self._email_key(email))
+
+    def stats(self):
+        return {"emails": len(self._by_email), "ips": len(self._by_ip), "locked": len(self._locked)}
+
+
+login_throttle = LoginThrottle()
@@ -0,0 +1,400 @@
+# Description: versioned schema migrations. Each step in MIGRATIONS runs once
+# per database and is recorded in the schema_version table, so app startup
+# only has to read MAX(version) instead of introspecting every table the way
+# db.create_all() did. Apply pending steps once per deploy:
+#
+#   flask --app app migrate        -> apply any pending migrations
+#   python migrations.py           -> same, without the flask CLI
+#   python migrations.py explain   -> EXPLAIN each hot query; fails if one misses its index or sorts
+#
+# The early steps are idempotent (they check before creating), so databases
+# that predate versioning are brought in line by the same run. Steps that
+# create tables use frozen copies of the table definitions as of that version,
+# never the live models, so replaying them always builds the same schema.
+#
+# migrate() holds a lock for the whole run (a lock file beside a SQLite
+# database, GET_LOCK on MySQL), so workers that boot together and all
+# auto-migrate apply each step once instead of racing on schema_version.
+#
+# UserVote.user_id and UserBadge.user_id are already served by the leading
+# column of their (user_id, ...) unique constraints, so they get no extra index.
+
+import sys
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from sqlalchemy import (select, func, text, insert, update, delete, MetaData, Table, Column, Integer, String,
+                        Text, DateTime, ForeignKey, UniqueConstraint)
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from extensions import db
+from model import User, Post, PostReport, UserVote, UserBadge, Achievement, UserAchievement, UTCDateTime
+from search import native_backend
+from feed_cache import FEED_STATUSES, FEED_ORDER, FEED_SCAN_ORDER
+from achievements import DEFAULT_ACHIEVEMENTS
+
+try:
+    import fcntl
+except ImportError:  # Windows: no gunicorn there, so no concurrent workers to serialise
+    fcntl = None
+
+
+def apply_columns(engine):
+    """Add columns declared on the models that existing tables are missing."""
+    added = []
+    with engine.begin() as conn:
+        inspector = db.inspect(conn)
+        existing_tables = set(inspector.get_table_names())
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            present = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in present:
+                    continue
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=conn.dialect)}"
+                if column.default is not None and column.default.is_scalar:
+                    # Existing rows need a value before NOT NULL can hold
+                    ddl += f" NOT NULL DEFAULT '{column.default.arg}'" if not column.nullable \
+                        else f" DEFAULT '{column.default.arg}'"
+                conn.execute(text(ddl))
+                added.append(f"{table.name}.{column.name}")
+    return added
+
+
+def apply_search_index(engine):
+    """Build the full-text index search.py uses; returns its name, or None if already present/unsupported."""
+    backend = native_backend(engine.dialect.name)
+    if backend is None:
+        return None
+    with engine.begin() as conn:
+        if backend.available(conn):
+            return None
+        backend.create_index(conn)
+    return backend.name
+
+
+def apply_indexes(engine):
+    """Create every index declared on the models that the database is missing."""
+    created = []
+    with engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            for index in sorted(table.indexes, key=lambda i: i.name):
+                if not db.inspect(conn).has_index(table.name, index.name):
+                    index.create(bind=conn)
+                    created.append(index.name)
+    return created
+
+
+# The tables as the first versioned release created them; later steps add to them
+V1_METADATA = MetaData()
+Table("user", V1_METADATA,
+      Column("id", Integer, primary_key=True, autoincrement=True),
+      Column("email", String(120), unique=True, nullable=False),
+      Column("name", String(120), nullable=False),
+      Column("password", String(128), nullable=False),
+      Column("role", String(50)),
+      Column("failed_attempts", Integer),
+      Column("locked_until", DateTime),
+      Column("points", Integer))
+Table("posts", V1_METADATA,
+      Column("id", Integer, primary_key=True),
+      Column("content", Text, nullable=False),
+      Column("category", String(50)),
+      Column("status", String(20)),
+      Column("created_at", DateTime),
+      Column("approved_at", DateTime),
+      Column("declined_at", DateTime),
+      Column("submitted_at", DateTime),
+      Column("reviewed_at", DateTime),
+      Column("review_msg", String(200)),
+      Column("upvotes", Integer),
+      Column("downvotes", Integer),
+      Column("created_by", Integer, ForeignKey("user.id"), nullable=False),
+      Column("report_count", Integer))
+Table("post_reports", V1_METADATA,
+      Column("id", Integer, primary_key=True),
+      Column("post_id", Integer, ForeignKey("posts.id"), nullable=False),
+      Column("reported_by", Integer, ForeignKey("user.id"), nullable=False),
+      Column("reason", String(200), nullable=False),
+      Column("reported_at", DateTime),
+      UniqueConstraint("post_id", "reported_by", name="unique_user_post_report"))
+Table("user_vote", V1_METADATA,
+      Column("id", Integer, primary_key=True),
+      Column("user_id", Integer, nullable=False),
+      Column("post_id", Integer, nullable=False),
+      Column("vote_type", String(10), nullable=False),
+      UniqueConstraint("user_id", "post_id", name="unique_user_post_vote"))
+Table("achievements", V1_METADATA,
+      Column("id", Integer, primary_key=True),
+      Column("name", String(50), nullable=False),
+      Column("threshold", Integer, nullable=False))
+Table("user_achievements", V1_METADATA,
+      Column("id", Integer, primary_key=True),
+      Column("user_id", Integer, ForeignKey("user.id"), nullable=False),
+      Column("achievement_id", Integer, ForeignKey("achievements.id"), nullable=False),
+      Column("unlocked_at", DateTime, nullable=False),
+      UniqueConstraint("user_id", "achievement_id", name="_user_ach_uc"))
+Table("user_badge", V1_METADATA,
+      Column("id", Integer, primary_key=True),
+      Column("user_id", Integer, ForeignKey("user.id"), nullable=False),
+      Column("badge_name", String(50), nullable=False),
+      Column("awarded_at", DateTime),
+      UniqueConstraint("user_id", "badge_name", name="unique_user_badge"))
+
+V7_METADATA = MetaData()
+Table("user", V7_METADATA, Column("id", Integer, primary_key=True))  # only the FK target
+Table("user_stats", V7_METADATA,
+      Column("user_id", Integer, ForeignKey("user.id"), primary_key=True),
+      Column("vote_count", Integer, nullable=False),
+      Column("submission_count", Integer, nullable=False),
+      Column("approved_count", Integer, nullable=False))
+
+
+def _create_missing(engine, metadata, names):
+    """Create the named tables of ``metadata`` that the database lacks; returns the ones created."""
+    with engine.begin() as conn:
+        existing = set(db.inspect(conn).get_table_names())
+        missing = [t for t in metadata.sorted_tables if t.name in names and t.name not in existing]
+        metadata.create_all(conn, tables=missing)
+    return [t.name for t in missing]
+
+
+def create_tables(engine):
+    """Create the original tables (V1_METADATA) that the database is missing."""
+    return _create_missing(engine, V1_METADATA, set(V1_METADATA.tables))
+
+
+def create_user_stats(engine):
+    """Create the user_stats counters table (see user_stats.py) if it is missing."""
+    return _create_missing(engine, V7_METADATA, {"user_stats"})
+
+
+def apply_achievement_names(engine):
+    """Merge duplicate achievement names, make names unique and seed the default badges into an empty table.
+
+    Earlier versions seeded the defaults on the first request, so workers that
+    raced there could each insert a full set.
+    """
+    achievements, user_achievements = Achievement.__table__, UserAchievement.__table__
+    with engine.begin() as conn:
+        kept, merged = {}, {}
+        for row in conn.execute(select(achievements.c.id, achievements.c.name).order_by(achievements.c.id)):
+            if row.name in kept:
+                merged[row.id] = kept[row.name]
+            else:
+                kept[row.name] = row.id
+        for duplicate, keep in merged.items():
+            holders = select(user_achievements.c.user_id).where(user_achievements.c.achievement_id == keep)
+            conn.execute(delete(user_achievements).where(user_achievements.c.achievement_id == duplicate,
+                                                         user_achievements.c.user_id.in_(holders)))
+            conn.execute(update(user_achievements).where(user_achievements.c.achievement_id == duplicate)
+                         .values(achievement_id=keep))
+        if merged:
+            conn.execute(delete(achievements).where(achievements.c.id.in_(list(merged))))
+
+        inspector = db.inspect(conn)
+        if not any(c["column_names"] == ["name"] for c in inspector.get_unique_constraints("achievements")) and \
+                not inspector.has_index("achievements", "unique_achievement_name"):
+            conn.execute(text("CREATE UNIQUE INDEX unique_achievement_name ON achievements (name)"))
+
+        notes = [f"merged {len(merged)} duplicate names"] if merged else []
+        if not kept:
+            conn.execute(insert(achievements), [r._asdict() for r in DEFAULT_ACHIEVEMENTS])
+            notes.append(f"seeded {len(DEFAULT_ACHIEVEMENTS)} default badges")
+    return notes
+
+
+def widen_password_column(engine):
+    """Grow user.password to the model's length so scrypt/pbkdf2:sha512 hashes fit."""
+    column = User.__table__.c.password
+    with engine.begin() as conn:
+        if conn.dialect.name == "sqlite":
+            return None  # SQLite does not enforce VARCHAR lengths
+        current = next(c for c in db.inspect(conn).get_columns("user") if c["name"] == "password")
+        if getattr(current["type"], "length", None) and current["type"].length >= column.type.length:
+            return None
+        table = conn.dialect.identifier_preparer.quote("user")
+        ddl = column.type.compile(dialect=conn.dialect)
+        if conn.dialect.name == "mysql":
+            conn.execute(text(f"ALTER TABLE {table} MODIFY password {ddl} NOT NULL"))
+        else:
+            conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN password TYPE {ddl}"))
+    return f"user.password -> {ddl}"
+
+
+# Kept out of db.metadata: it belongs to the migration runner, not the app
+schema_version_table = Table(
+    "schema_version", MetaData(),
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("description", String(200), nullable=False),
+    Column("applied_at", UTCDateTime, nullable=False),
+)
+
+# (version, description, step); append new steps, never renumber applied ones
+MIGRATIONS = [
+    (1, "create tables", create_tables),
+    (2, "add columns missing from older tables", apply_columns),
+    (3, "hot-query indexes", apply_indexes),
+    (4, "full-text search index", apply_search_index),
+    (5, "unique achievement names, default badges", apply_achievement_names),
+    (6, "widen user.password", widen_password_column),
+    (7, "user_stats counters table", create_user_stats),
+]
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(engine):
+    """The database's applied schema version (0 if it has never been migrated); one cheap query."""
+    try:
+        with engine.connect() as conn:
+            return conn.execute(select(func.max(schema_version_table.c.version))).scalar() or 0
+    except (OperationalError, ProgrammingError):
+        # No schema_version table yet
+        return 0
+
+
+@contextmanager
+def _migration_lock(engine):
+    """Hold a host- or server-wide lock so only one process migrates at a time."""
+    if engine.dialect.name == "mysql":
+        with engine.connect() as conn:
+            if conn.execute(text("SELECT GET_LOCK('schema_migrate', 600)")).scalar() != 1:
+                raise RuntimeError("Timed out waiting for another process's migration")
+            try:
+                yield
+            finally:
+                conn.execute(text("SELECT RELEASE_LOCK('schema_migrate')"))
+        return
+    database = engine.url.database if engine.dialect.name == "sqlite" else None
+    if fcntl is None or not database or database == ":memory:":
+        yield
+        return
+    with open(f"{database}.migrate-lock", "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def migrate(engine, report=print):
+    """Apply every pending migration in order; returns the versions applied."""
+    with _migration_lock(engine):
+        # Read under the lock: a worker that waited finds the steps already applied
+        schema_version_table.create(engine, checkfirst=True)
+        current = schema_version(engine)
+        applied = []
+        for version, description, step in MIGRATIONS:
+            if version <= current:
+                continue
+            result = step(engine)
+            with engine.begin() as conn:
+                conn.execute(insert(schema_version_table).values(
+                    version=version, description=description, applied_at=datetime.now(timezone.utc)))
+            detail = ", ".join(result) if isinstance(result, list) else result
+            report(f"Applied {version}: {description}" + (f" ({detail})" if detail else ""))
+            applied.append(version)
+    if not applied:
+        report(f"Schema is up to date (version {current})")
+    return applied
+
+
+def check_schema(app):
+    """Boot-time check: True if the schema is current (migrating first when SCHEMA_AUTO_MIGRATE is on)."""
+    version = schema_version(db.engine)
+    if version >= LATEST_VERSION:
+        return True
+    if app.config.get('SCHEMA_AUTO_MIGRATE'):
+        migrate(db.engine, report=app.logger.info)
+        return True
+    app.logger.error("Database schema is at version %d, this code needs %d; run `flask --app app migrate`",
+                     version, LATEST_VERSION)
+    return False
+
+
+# Representative statement for each route's query, with the index we expect it to use
+HOT_QUERIES = [
+    ("feed page", "ix_posts_status_upvotes",
+     lambda: select(Post.id, Post.upvotes).where(Post.status == "Approved")
+                            .order_by(*FEED_ORDER).limit(51)),
+    ("whole feed", "ix_posts_status_upvotes",
+     lambda: select(Post.id, Post.upvotes).where(Post.status.in_(FEED_STATUSES))
+                            .order_by(*FEED_SCAN_ORDER)),
+    ("my posts", "ix_posts_created_by_status_submitted",
+     lambda: select(Post.id).where(Post.created_by == 1, Post.status == "Approved")
+                            .order_by(Post.submitted_at.desc())),
+    ("submission count", "ix_posts_created_by_status_submitted",
+     lambda: select(func.count()).select_from(Post).where(Post.created_by == 1)),
+    ("flagged posts", "ix_posts_status_report_count",
+     lambda: select(Post.id).where(Post.report_count > 0, Post.status == "Approved")),
+    ("reported by user", "ix_post_reports_reported_by_post",
+     lambda: select(PostReport.post_id).where(PostReport.reported_by == 1)),
+    ("user votes", "unique_user_post_vote",
+     lambda: select(UserVote.post_id, UserVote.vote_type).where(UserVote.user_id == 1)),
+    ("user badges", "unique_user_badge",
+     lambda: select(UserBadge.badge_name).where(UserBadge.user_id == 1)),
+]
+
+
+def _plan(conn, sql):
+    """Return (index names the database plans to seek, not scan, for ``sql``; whether it adds a sort step)."""
+    if conn.dialect.name == "sqlite":
+        used, sorts = [], False
+        for row in conn.execute(text("EXPLAIN QUERY PLAN " + sql)):
+            detail = row[-1]
+            if detail.startswith("SEARCH") and " INDEX " in detail:
+                used.append(detail.split(" INDEX ", 1)[1].split(" ")[0])
+            sorts = sorts or detail.startswith("USE TEMP B-TREE")
+        return used, sorts
+    rows = list(conn.execute(text("EXPLAIN " + sql)).mappings())
+    used = [row["key"] for row in rows if row["key"] and row["type"] not in ("ALL", "index")]
+    sorts = any("Using filesort" in (row["Extra"] or "") or "Using temporary" in (row["Extra"] or "")
+                for row in rows)
+    return used, sorts
+
+
+def _unique_constraint_table(name):
+    """The table that declares unique constraint ``name``, or None if no model declares one."""
+    for table in db.metadata.sorted_tables:
+        if any(isinstance(c, UniqueConstraint) and c.name == name for c in table.constraints):
+            return table.name
+    return None
+
+
+def _uses_index(dialect, expected, used):
+    if expected in used:
+        return True
+    # SQLite gives the index behind a UNIQUE constraint its own name, sqlite_autoindex_<table>_N
+    table = _unique_constraint_table(expected)
+    return dialect == "sqlite" and table is not None and \
+        any(name.startswith(f"sqlite_autoindex_{table}_") for name in used)
+
+
+def explain_hot_queries(engine):
+    """EXPLAIN every hot query; returns (name, expected index, indexes used, sorts, ok) tuples.
+
+    A query is ok when it seeks the expected index and needs no sort step
+    (SQLite "USE TEMP B-TREE", MySQL "Using filesort"/"Using temporary").
+    """
+    results = []
+    with engine.connect() as conn:
+        for name, expected, build in HOT_QUERIES:
+            sql = str(build().compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+            used, sorts = _plan(conn, sql)
+            ok = _uses_index(engine.dialect.name, expected, used) and not sorts
+            results.append((name, expected, used, sorts, ok))
+    return results
+
+
+if __name__ == '__main__':
+    from app import app
+
+    with app.app_context():
+        if len(sys.argv) > 1 and sys.argv[1] == "explain":
+            failures = 0
+            for name, expected, used, sorts, ok in explain_hot_queries(db.engine):
+                status = "OK  " if ok else "SORT" if sorts else "MISS"
+                print(f"{status} {name:<18} expected {expected:<38} used {', '.join(used) or '-'}")
+                failures += not ok
+            sys.exit(1 if failures else 0)
+
+        migrate(db.engine)
@@ -1,5 +1,36 @@
 from extensions import db
 from datetime import datetime, timezone
+from sqlalchemy import insert
+from sqlalchemy.types import TypeDecorator
+
+
+def insert_ignore(model):
+    """INSERT that skips rows colliding with a unique key (MySQL INSERT IGNORE / SQLite INSERT OR IGNORE).
+
+    The statement's rowcount tells the caller whether its row actually went in.
+    """
+    return insert(model).prefix_with('IGNORE', dialect='mysql').prefix_with('OR IGNORE', dialect='sqlite')
+
+
+class UTCDateTime(TypeDecorator):
+    """DateTime stored as naive UTC and loaded back as an aware UTC datetime.
+
+    Aware values are converted to UTC before they are written; naive values
+    (rows written before this type existed) are taken to be UTC already.
+    """
+    impl = db.DateTime
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+    def process_result_value(self, value, dialect):
+        if value is not None and value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value
+
 
 class User(db.Model):
     __tablename__ = 'user'
@@ -7,10 +38,11 @@ class User(db.Model):
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     email = db.Column(db.String(120), unique=True, nullable=False)
     name = db.Column(db.String(120), nullable=False)
-    password = db.Column(db.String(128), nullable=False)
+    # Room for the longest Werkzeug hashes (pbkdf2:sha512 ~167, scrypt ~162 characters)
+    password = db.Column(db.String(255), nullable=False)
     role = db.Column(db.String(50), default='user')
     failed_attempts = db.Column(db.Integer, default=0)
-    locked_until = db.Column(db.DateTime, nullable=True)
+    locked_until = db.Column(UTCDateTime, nullable=True)
     points = db.Column(db.Integer, default=0)
 
     def __repr__(self):
@@ -24,11 +56,11 @@ class Post(db.Model):
     content = db.Column(db.Text, nullable=False)
     category = db.Column(db.String(50))
     status = db.Column(db.String(20))
-    created_at = db.Column(db.DateTime)
-    approved_at = db.Column(db.DateTime, nullable=True)
-    declined_at = db.Column(db.DateTime, nullable=True)
-    submitted_at = db.Column(db.DateTime)
-    reviewed_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(UTCDateTime)
+    approved_at = db.Column(UTCDateTime, nullable=True)
+    declined_at = db.Column(UTCDateTime, nullable=True)
+    submitted_at = db.Column(UTCDateTime)
+    reviewed_at = db.Column(UTCDateTime, nullable=True)
     review_msg = db.Column(db.String(200))
     
     upvotes = db.Column(db.Integer, default=0)
@@ -41,6 +73,16 @@ class Post(db.Model):
     report_count = db.Column(db.Integer, default=0)
     reports = db.relationship('PostReport', backref='post', lazy='dynamic', cascade='all, delete-orphan')
 
+    # Composite indexes for the hot query shapes (see migrations.py for existing databases):
+    #   feed       -> status IN (...) ORDER BY upvotes DESC, id DESC
+    #   my posts   -> created_by = ? AND status = ? ORDER BY submitted_at DESC (prefix also serves badge counts)
+    #   flagged    -> status = 'Approved' AND report_count > 0
+    __table_args__ = (
+        db.Index('ix_posts_status_upvotes', 'status', 'upvotes'),
+        db.Index('ix_posts_created_by_status_submitted', 'created_by', 'status', 'submitted_at'),
+        db.Index('ix_posts_status_report_count', 'status', 'report_count'),
+    )
+
 
 class PostReport(db.Model):
     __tablename__ = 'post_reports'
@@ -49,10 +91,13 @@ class PostReport(db.Model):
     post_id = db.Column(db.Integer, db.ForeignKey('posts.id'), nullable=False)
     reported_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     reason = db.Column(db.String(200), nullable=False)
-    reported_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    reported_at = db.Column(UTCDateTime, default=lambda: datetime.now(timezone.utc))
     
-    # Ensure one user can only report a post once
-    __table_args__ = (db.UniqueConstraint('post_id', 'reported_by', name='unique_user_post_report'),)
+    # Ensure one user can only report a post once; the second index serves "posts I reported" lookups
+    __table_args__ = (
+        db.UniqueConstraint('post_id', 'reported_by', name='unique_user_post_report'),
+        db.Index('ix_post_reports_reported_by_post', 'reported_by', 'post_id'),
+    )
 
 class UserVote(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -67,14 +112,17 @@ class Achievement(db.Model):
     __tablename__ = 'achievements'
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), nullable=False)
+    # Which UserStats counter the threshold applies to: 'votes', 'submissions' or 'approved'
+    category = db.Column(db.String(20), nullable=False, default='votes')
     threshold = db.Column(db.Integer, nullable=False)
+    __table_args__ = (db.UniqueConstraint('name', name='unique_achievement_name'),)
 
 class UserAchievement(db.Model):
     __tablename__ = 'user_achievements'
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     achievement_id = db.Column(db.Integer, db.ForeignKey('achievements.id'), nullable=False)
-    unlocked_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    unlocked_at = db.Column(UTCDateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
     __table_args__ = (
         db.UniqueConstraint('user_id','achievement_id', name='_user_ach_uc'),
     )
@@ -82,6 +130,19 @@ class UserBadge(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     badge_name = db.Column(db.String(50), nullable=False)
-    awarded_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    awarded_at = db.Column(UTCDateTime, default=lambda: datetime.now(timezone.utc))
     __table_args__ = (db.UniqueConstraint('user_id', 'badge_name', name='unique_user_badge'),)
-    
\ No newline at end of file
+
+
+class UserStats(db.Model):
+    """Running per-user counters kept in step with votes, submissions and approvals.
+
+    Rows are created lazily from the user's history the first time they are
+    needed (see user_stats.py), after which every event adjusts them in place.
+    """
+    __tablename__ = 'user_stats'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    vote_count = db.Column(db.Integer, nullable=False, default=0)
+    submission_count = db.Column(db.Integer, nullable=False, default=0)
+    approved_count = db.Column(db.Integer, nullable=False, default=0)
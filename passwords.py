@@ -0,0 +1,109 @@
+# Description: password hashing that stays off the gevent event loop.
+#
+# pbkdf2/scrypt are CPU-bound for hundreds of milliseconds by design, and a
+# gunicorn gevent worker runs every request on one OS thread, so hashing inline
+# stalls every other greenlet in the worker for that long. hashlib releases the
+# GIL while it hashes, so under gevent the work is handed to a small native
+# thread pool and only the calling greenlet waits. Outside gevent (threaded
+# dev server, scripts) it simply runs inline.
+#
+# The method and cost come from PASSWORD_HASH_METHOD (Werkzeug syntax, e.g.
+# "pbkdf2:sha256:600000" or "scrypt:32768:8:1"). Hashes made with other
+# parameters still verify, and login upgrades them (see needs_rehash). A
+# method whose hashes would not fit in user.password is refused at startup.
+
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash, DEFAULT_PBKDF2_ITERATIONS
+from model import User
+
+# Werkzeug hashes are "<method>$<salt>$<hex digest>"
+SALT_LENGTH = 16
+SCRYPT_KEY_LENGTH = 64
+
+try:
+    from gevent import monkey as gevent_monkey
+    from gevent.threadpool import ThreadPool
+except ImportError:
+    gevent_monkey = None
+
+
+def normalize_method(method):
+    """Spell a Werkzeug method string out in full, the way it is recorded in the hash."""
+    name, *args = method.split(":")
+    if name == "pbkdf2":
+        hash_name = args[0] if args else "sha256"
+        iterations = int(args[1]) if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return f"pbkdf2:{hash_name}:{iterations}"
+    if name == "scrypt":
+        n, r, p = map(int, args) if args else (2**15, 8, 1)
+        return f"scrypt:{n}:{r}:{p}"
+    raise ValueError(f"Unsupported password hash method '{method}'")
+
+
+def hash_length(method):
+    """Length of the hashes a normalized ``method`` produces."""
+    name, *args = method.split(":")
+    key_length = hashlib.new(args[0]).digest_size if name == "pbkdf2" else SCRYPT_KEY_LENGTH
+    return len(method) + 1 + SALT_LENGTH + 1 + 2 * key_length
+
+
+class PasswordHasher:
+    """Hash and verify passwords on a native thread pool when running under gevent."""
+
+    def __init__(self, method="pbkdf2:sha256", workers=4):
+        self.method = normalize_method(method)
+        self.workers = workers
+        self._pool = None
+
+    def init_app(self, app):
+        method = normalize_method(app.config.get('PASSWORD_HASH_METHOD', self.method))
+        limit = User.__table__.c.password.type.length
+        if hash_length(method) > limit:
+            raise ValueError(f"PASSWORD_HASH_METHOD '{method}' makes {hash_length(method)}-character hashes; "
+                             f"user.password holds {limit}")
+        self.method = method
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS', self.workers)
+
+    def _gevent_pool(self):
+        """The native thread pool to hash on, or None when not running under gevent."""
+        if not self.workers or gevent_monkey is None or not gevent_monkey.is_module_patched("threading"):
+            return None
+        if self._pool is None:
+            # Created on first use so each forked worker gets its own threads
+            self._pool = ThreadPool(self.workers)
+        return self._pool
+
+    def _run(self, fn, *args):
+        pool = self._gevent_pool()
+        return pool.apply(fn, args) if pool is not None else fn(*args)
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def hash_many(self, values):
+        """Hash a batch of passwords in parallel; returns the hashes in order.
+
+        Threads, not processes: hashlib drops the GIL while hashing, so they
+        use every core without pickling or forking a monkey-patched worker.
+        """
+        pool = self._gevent_pool()
+        if pool is not None:
+            return pool.map(self._hash_plain, values)
+        if self.workers and len(values) > 1:
+            with ThreadPoolExecutor(self.workers) as executor:
+                return list(executor.map(self._hash_plain, values))
+        return [self._hash_plain(v) for v in values]
+
+    def _hash_plain(self, password):
+        return generate_password_hash(password, self.method)
+
+    def verify(self, stored_hash, password):
+        return self._run(check_password_hash, stored_hash, password)
+
+    def needs_rehash(self, stored_hash):
+        """True if ``stored_hash`` was made with a method or cost other than the configured one."""
+        return stored_hash.split("$", 1)[0] != self.method
+
+
+passwords = PasswordHasher()
@@ -0,0 +1,107 @@
+# Description: connection counts for the live feed. Connect/disconnect update
+# in-process counters in O(1); a background task periodically publishes this
+# worker's counts to a shared directory and sums every live worker's file, so
+# count() always answers from a cached host-wide total without any I/O.
+
+import json
+import os
+import threading
+import time
+from collections import Counter
+
+
+class PresenceRegistry:
+    """Global and per-room connection counters, aggregated across workers."""
+
+    def __init__(self, refresh_interval=5.0, worker_id=None):
+        self.refresh_interval = refresh_interval
+        self.directory = None  # shared by all workers on the host; None = this process only
+        self.worker_id = worker_id  # names this worker's file; defaults to the pid
+        self._lock = threading.Lock()
+        self._total = 0
+        self._rooms = Counter()
+        self._cached_total = 0
+        self._cached_rooms = {}
+        self._task = None
+
+    def init_app(self, app, socketio):
+        self.refresh_interval = app.config.get('PRESENCE_REFRESH_INTERVAL', self.refresh_interval)
+        self.directory = app.config.get('PRESENCE_DIR')
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            # Pick up the other workers' counts now rather than one interval after startup
+            self.refresh()
+        if self.directory and self._task is None and socketio.server is not None:
+            self._task = socketio.start_background_task(self._run, socketio)
+
+    def connected(self, *rooms):
+        with self._lock:
+            self._total += 1
+            self._rooms.update(rooms)
+            if not self.directory:
+                self._publish_local()
+
+    def disconnected(self, *rooms):
+        with self._lock:
+            self._total = max(0, self._total - 1)
+            self._rooms.subtract(rooms)
+            if not self.directory:
+                self._publish_local()
+
+    def count(self, room=None):
+        """Host-wide connection count (or a room's), at most one refresh interval old."""
+        if room is None:
+            return self._cached_total
+        return self._cached_rooms.get(room, 0)
+
+    def _publish_local(self):
+        # Single process: the cache simply mirrors the local counters
+        self._cached_total = self._total
+        self._cached_rooms = {room: n for room, n in self._rooms.items() if n > 0}
+
+    def refresh(self):
+        """Write this worker's counts and re-sum every worker's that is still fresh."""
+        if not self.directory:
+            return
+        with self._lock:
+            snapshot = {'total': self._total, 'rooms': {r: n for r, n in self._rooms.items() if n > 0},
+                        'ts': time.time()}
+        path = os.path.join(self.directory, f'presence-{self.worker_id or os.getpid()}.json')
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(snapshot, f)
+        os.replace(tmp, path)
+
+        total, rooms = 0, Counter()
+        oldest = time.time() - 3 * self.refresh_interval
+        for name in os.listdir(self.directory):
+            if not (name.startswith('presence-') and name.endswith('.json')):
+                continue
+            other = os.path.join(self.directory, name)
+            try:
+                with open(other) as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if data['ts'] < oldest:
+                # That worker stopped refreshing (it exited or hung); don't count its clients
+                try:
+                    os.unlink(other)
+                except FileNotFoundError:
+                    pass
+                continue
+            total += data['total']
+            rooms.update(data['rooms'])
+        self._cached_total = total
+        self._cached_rooms = dict(rooms)
+
+    def _run(self, socketio):
+        while True:
+            try:
+                self.refresh()
+            except OSError:
+                pass
+            socketio.sleep(self.refresh_interval)
+
+
+presence = PresenceRegistry()
@@ -0,0 +1,31 @@
+# Description: read-only rows for list pages. Selecting just the columns a
+# list renders into a namedtuple skips what loading full Post entities costs
+# (identity map, change tracking, per-instance state), and the rows are
+# immutable, so they can be cached and shared between requests safely.
+
+from collections import namedtuple
+from sqlalchemy import select, func
+from extensions import db
+from model import Post
+
+# Every field the feed, dashboards and admin list templates read from a post
+PostRow = namedtuple("PostRow", [
+    "id", "category", "content", "status", "upvotes", "downvotes", "report_count",
+    "created_at", "submitted_at", "reviewed_at",
+])
+
+POST_ROW_COLUMNS = (
+    Post.id, Post.category, Post.content, Post.status,
+    func.coalesce(Post.upvotes, 0).label("upvotes"),
+    func.coalesce(Post.downvotes, 0).label("downvotes"),
+    func.coalesce(Post.report_count, 0).label("report_count"),
+    Post.created_at, Post.submitted_at, Post.reviewed_at,
+)
+
+
+def post_rows(*criteria, order_by=(), limit=None):
+    """PostRows for the posts matching ``criteria``, in ``order_by`` order."""
+    stmt = select(*POST_ROW_COLUMNS).where(*criteria).order_by(*order_by)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return [PostRow._make(row) for row in db.session.execute(stmt)]
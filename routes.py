@@ -4,9 +4,23 @@ from flask_jwt_extended import decode_token
 import jwt
 import pathlib
 import html
+import base64
+import binascii
+import hashlib
+from collections import defaultdict
 from datetime import datetime, timezone
+from sqlalchemy import select, update, delete
 from extensions import db
-from model import Post, PostReport, UserVote, User, Achievement, UserBadge
+from model import Post, PostReport, UserVote
+from votes import cast_vote, vote_buffer, VoteConflict
+from user_stats import bump_user_stats
+from achievements import evaluate_achievements, get_badge_catalog
+from feed_cache import feed_cache, load_approved_feed, feed_rows
+from read_models import post_rows
+from websockets import publish_post_counts
+from search import search
+from suggest import suggestions
+from current_user import load_current_user
 
 
 routes_bp = Blueprint('routes', __name__)
@@ -15,94 +29,13 @@ routes_bp = Blueprint('routes', __name__)
 def home():
     return render_template('index.html')
 
-def award_badge(user_id, badge_name):
-    user = User.query.get(user_id)
-    if not user or user.role == 'admin':
-        return
-    if not UserBadge.query.filter_by(user_id=user_id, badge_name=badge_name).first():
-        db.session.add(UserBadge(user_id=user_id, badge_name=badge_name))
-        db.session.commit()
+def _set_post_status(post, new_status):
+    """Change a post's status, keeping the author's approved_count in step (caller commits)."""
+    was_approved = post.status == "Approved"
+    post.status = new_status
+    if was_approved != (new_status == "Approved"):
+        bump_user_stats(post.created_by, approved=1 if new_status == "Approved" else -1)
 
-def check_and_award_vote_badges(user_id):
-    vote_count = UserVote.query.filter_by(user_id=user_id).count()
-    if vote_count >= 1:
-        award_badge(user_id, 'First Vote')
-    if vote_count >= 10:
-        award_badge(user_id, '10 Votes')
-    if vote_count >= 50:
-        award_badge(user_id, '50 Votes')
-
-def check_and_award_submission_badges(user_id):
-    submission_count = Post.query.filter_by(created_by=user_id).count()
-    if submission_count >= 1:
-        award_badge(user_id, 'First Submission')
-    if submission_count >= 10:
-        award_badge(user_id, '10 Submissions')
-    if submission_count >= 50:
-        award_badge(user_id, '50 Submissions')
-
-def check_and_award_approved_post_badges(user_id):
-    approved_count = Post.query.filter_by(created_by=user_id, status='Approved').count()
-    if approved_count >= 1:
-        award_badge(user_id, 'First Post')
-    if approved_count >= 10:
-        award_badge(user_id, '10 Posts')
-    if approved_count >= 50:
-        award_badge(user_id, '50 Posts')
-
-def _get_counts_for_user(user_id: int):
-    vote_count = UserVote.query.filter_by(user_id=user_id).count()
-    submission_count = Post.query.filter_by(created_by=user_id).count()
-    approved_count = Post.query.filter_by(created_by=user_id, status='Approved').count()
-    return vote_count, submission_count, approved_count
-
-def get_badge_catalog(user_id: int):
-    """Return a catalog of all badges with earned flag and progress for the given user."""
-    vote_count, submission_count, approved_count = _get_counts_for_user(user_id)
-    earned = {b.badge_name: b for b in UserBadge.query.filter_by(user_id=user_id).all()}
-
-    definitions = [
-        {"name": "First Vote", "category": "votes", "threshold": 1},
-        {"name": "10 Votes", "category": "votes", "threshold": 10},
-        {"name": "50 Votes", "category": "votes", "threshold": 50},
-        {"name": "First Submission", "category": "submissions", "threshold": 1},
-        {"name": "10 Submissions", "category": "submissions", "threshold": 10},
-        {"name": "50 Submissions", "category": "submissions", "threshold": 50},
-        {"name": "First Post", "category": "approved", "threshold": 1},
-        {"name": "10 Posts", "category": "approved", "threshold": 10},
-        {"name": "50 Posts", "category": "approved", "threshold": 50},
-    ]
-
-    def current_for(cat):
-        if cat == 'votes':
-            return vote_count
-        if cat == 'submissions':
-            return submission_count
-        if cat == 'approved':
-            return approved_count
-        return 0
-
-    def emoji_for_threshold(threshold: int):
-        if threshold >= 50:
-            return "🥇"
-        if threshold >= 10:
-            return "🥈"
-        return "🥉"
-
-    catalog = []
-    for d in definitions:
-        badge_obj = earned.get(d["name"]) if d["name"] in earned else None
-        catalog.append({
-            "name": d["name"],
-            "category": d["category"],
-            "threshold": d["threshold"],
-            "current": min(current_for(d["category"]), d["threshold"]),
-            "earned": d["name"] in earned,
-            "awarded_at": getattr(badge_obj, 'awarded_at', None),
-            "emoji": emoji_for_threshold(d["threshold"]) 
-        })
-    return catalog
-   
 @routes_bp.route("/submit-feedback", methods=["POST"])
 def submit_feedback():
     if not session.get("user_id"):
@@ -129,8 +62,10 @@ def submit_feedback():
     )
 
     db.session.add(new_post)
+    bump_user_stats(new_post.created_by, submissions=1)
     db.session.commit()
-    check_and_award_submission_badges(new_post.created_by)
+    suggestions.add(new_post.id, new_post.category, new_post.content)
+    evaluate_achievements(new_post.created_by)
     return jsonify({"status": "success", "message": "Thank you for your feedback! It has been submitted and is now pending approval."})
 
 
@@ -147,34 +82,100 @@ def serve_feedback_form():
     return render_template("submit.html")
 
 
+FEED_PAGE_DEFAULT = 50
+FEED_PAGE_MAX = 200
+
+def _encode_cursor(upvotes, post_id):
+    raw = f"{upvotes or 0}:{post_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def _decode_cursor(token):
+    """Turn a next_cursor token back into its (upvotes, id) keyset position."""
+    padded = token + "=" * (-len(token) % 4)
+    upvotes, post_id = base64.urlsafe_b64decode(padded.encode()).decode().split(":")
+    return int(upvotes), int(post_id)
+
+def _feed_etag(*parts):
+    """Weak ETag over the data a feed response is built from.
+
+    Callers pass what the database returned (or a digest of it) rather than a
+    per-process counter, so every worker hands out the same tag for the same
+    data and a tag changes exactly when that data does.
+    """
+    raw = ":".join(str(p) for p in parts)
+    return hashlib.blake2b(raw.encode(), digest_size=12).hexdigest()
+
+def _with_etag(response, etag):
+    response.set_etag(etag, weak=True)
+    response.headers["Cache-Control"] = "no-cache"  # always revalidate, never reuse blindly
+    return response
+
+def _not_modified(etag):
+    """304 for a poll whose validator still matches, or None to build the full response."""
+    if request.if_none_match.contains_weak(etag):
+        return _with_etag(Response(status=304), etag)
+    return None
+
 @routes_bp.route("/api/approved_posts", methods=["GET"])
 def get_approved_posts():
-    posts = Post.query.filter(Post.status.in_(["Approved", "admin"]))\
-                      .order_by(Post.upvotes.desc()).all()
-    
-    for post in posts:
-        if post.created_at and post.created_at.tzinfo is None:
-            post.created_at = post.created_at.replace(tzinfo=timezone.utc)
-    
+    try:
+        limit = min(max(int(request.args.get("limit", FEED_PAGE_DEFAULT)), 1), FEED_PAGE_MAX)
+    except ValueError:
+        return jsonify({"status": "error", "message": "limit must be an integer."}), 400
+
+    cursor = request.args.get("cursor")
     user_id = session.get("user_id")
     user_role = session.get("user_role")
-    reported_posts = []
-    
-    if user_id:
-        reported_posts = [r.post_id for r in PostReport.query.filter_by(reported_by=user_id).all()]
-    
-    return jsonify([
-        {
-            "id": p.id,
-            "category": p.category,
-            "content": p.content,
-            "timestamp": p.created_at.isoformat() if p.created_at else "",
-            "status": p.status,
-            "upvotes": p.upvotes,
-            "reported": p.id in reported_posts,
-            "report_count": p.report_count if user_role == "admin" else None
-        } for p in posts
-    ])
+    if cursor:
+        try:
+            last_position = _decode_cursor(cursor)
+        except (ValueError, binascii.Error):
+            return jsonify({"status": "error", "message": "Invalid cursor."}), 400
+    else:
+        last_position = None
+
+    def load_page():
+        # Keyset pagination on (upvotes, id): each page is an index range scan that
+        # starts right after the last row of the previous page, so the cost of a
+        # page does not grow with the size of the table.
+        rows = feed_rows(last_position, limit + 1)
+        page = tuple(rows[:limit])
+        next_cursor = _encode_cursor(page[-1].upvotes, page[-1].id) if len(rows) > limit else None
+        # Digest of the rows as loaded, cached with them; a user's own report shows up in report_count
+        return page, next_cursor, _feed_etag(*page)
+
+    posts, next_cursor, page_tag = feed_cache.get_or_load(("page", last_position, limit), load_page)
+
+    # Votes still sitting in the write-behind buffer (empty unless VOTE_WRITE_BEHIND is on)
+    pending_votes = vote_buffer.pending_posts() if vote_buffer.enabled else {}
+    pending = [(p.id, pending_votes[p.id][0]) for p in posts if p.id in pending_votes]
+    etag = _feed_etag("approved_posts", page_tag, pending, user_id, user_role, next_cursor)
+    not_modified = _not_modified(etag)
+    if not_modified:
+        return not_modified
+
+    reported_posts = set()
+    if user_id and posts:
+        reported_posts = {r.post_id for r in PostReport.query.filter(
+            PostReport.reported_by == user_id,
+            PostReport.post_id.in_([p.id for p in posts])
+        ).all()}
+    
+    return _with_etag(jsonify({
+        "posts": [
+            {
+                "id": p.id,
+                "category": p.category,
+                "content": p.content,
+                "timestamp": p.created_at.isoformat() if p.created_at else "",
+                "status": p.status,
+                "upvotes": max(0, p.upvotes + pending_votes.get(p.id, (0, 0))[0]),
+                "reported": p.id in reported_posts,
+                "report_count": p.report_count if user_role == "admin" else None
+            } for p in posts
+        ],
+        "next_cursor": next_cursor
+    }), etag)
 
 
 
@@ -207,40 +208,57 @@ def handle_create_post():
     )
 
     db.session.add(new_post)
+    bump_user_stats(new_post.created_by, submissions=1)
     db.session.commit()
+    feed_cache.bump()
+    suggestions.add(new_post.id, new_post.category, new_post.content)
 
     return jsonify({"status": "success", "message": "Post submitted successfully!"})
 
+MODERATION_PAGE_SIZE = 25
+MODERATION_PAGE_MAX = 100
+
+def _load_reports_by_post(post_ids):
+    """All reports for the given posts in one IN query, grouped by post id."""
+    reports_by_post = defaultdict(list)
+    if post_ids:
+        reports = PostReport.query.filter(PostReport.post_id.in_(post_ids))\
+                                  .order_by(PostReport.reported_at).all()
+        for report in reports:
+            reports_by_post[report.post_id].append(report)
+    return reports_by_post
+
 @routes_bp.route("/admin/pending")
 def admin_pending():
+    # The queue costs a fixed number of queries however many posts are flagged:
+    # a count and a page for each list, plus one IN query for the page's reports.
+    per_page = min(max(request.args.get("per_page", MODERATION_PAGE_SIZE, type=int), 1), MODERATION_PAGE_MAX)
+    pending_page = max(request.args.get("pending_page", 1, type=int), 1)
+    flagged_page = max(request.args.get("flagged_page", 1, type=int), 1)
     try:
-        pending_posts = Post.query.filter_by(status="Pending").all()
-        flagged_posts = Post.query.filter(Post.report_count > 0, Post.status == "Approved").all()
-
-        for post in pending_posts:
-            if post.submitted_at and post.submitted_at.tzinfo is None:
-                post.submitted_at = post.submitted_at.replace(tzinfo=timezone.utc)
-        
-        for post in flagged_posts:
-            if post.submitted_at and post.submitted_at.tzinfo is None:
-                post.submitted_at = post.submitted_at.replace(tzinfo=timezone.utc)
-            if post.reviewed_at and post.reviewed_at.tzinfo is None:
-                post.reviewed_at = post.reviewed_at.replace(tzinfo=timezone.utc)
-
+        pending = Post.query.filter_by(status="Pending")\
+                            .order_by(Post.submitted_at, Post.id)\
+                            .paginate(page=pending_page, per_page=per_page, error_out=False)
+        flagged = Post.query.filter(Post.report_count > 0, Post.status == "Approved")\
+                            .order_by(Post.report_count.desc(), Post.id)\
+                            .paginate(page=flagged_page, per_page=per_page, error_out=False)
+        pending_posts = pending.items
+        flagged_posts = flagged.items
+
+        reports_by_post = _load_reports_by_post([post.id for post in flagged_posts])
         flagged_posts_with_reports = []
         for post in flagged_posts:
-            reports = PostReport.query.filter_by(post_id=post.id).all()
-            for report in reports:
-                if report.reported_at and report.reported_at.tzinfo is None:
-                    report.reported_at = report.reported_at.replace(tzinfo=timezone.utc)
             flagged_posts_with_reports.append({
                 'post': post,
-                'reports': reports
+                'reports': reports_by_post.get(post.id, [])
             })
         
         return render_template("pending.html", 
                              pending_posts=pending_posts, 
-                             flagged_posts_with_reports=flagged_posts_with_reports)
+                             flagged_posts_with_reports=flagged_posts_with_reports,
+                             pending_pagination=pending,
+                             flagged_pagination=flagged,
+                             per_page=per_page)
     except Exception as e:
         flash(f"Database error: {str(e)}", "error")
         return render_template("pending.html", pending_posts=[], flagged_posts_with_reports=[])
@@ -248,20 +266,23 @@ def admin_pending():
 @routes_bp.route("/admin/approve/<int:pid>", methods=["POST"])
 def approve_post(pid):
     post = Post.query.get_or_404(pid)
-    post.status = "Approved"
+    _set_post_status(post, "Approved")
     post.reviewed_at = datetime.now(timezone.utc)
     post.review_msg = "Approved ✅"
     db.session.commit()
-    check_and_award_approved_post_badges(post.created_by)
+    feed_cache.bump()
+    publish_post_counts(post.id, post.upvotes, post.downvotes)
+    evaluate_achievements(post.created_by)
     return redirect(url_for('routes.admin_pending'))
 
 @routes_bp.route("/admin/decline/<int:pid>", methods=["POST"])
 def decline_post(pid):
     post = Post.query.get_or_404(pid)
-    post.status = "Declined"
+    _set_post_status(post, "Declined")
     post.reviewed_at = datetime.now(timezone.utc)
     post.review_msg = "Declined ❌"
     db.session.commit()
+    feed_cache.bump()
     return redirect(url_for('routes.admin_pending'))
 
 @routes_bp.route("/admin/approve-flagged/<int:pid>", methods=["POST"])
@@ -272,30 +293,102 @@ def approve_flagged_post(pid):
     post.reviewed_at = datetime.now(timezone.utc)
     post.review_msg = "Re-approved after flag review ✅"
     db.session.commit()
+    feed_cache.bump()
     return redirect(url_for('routes.admin_pending'))
 
 @routes_bp.route("/admin/decline-flagged/<int:pid>", methods=["POST"])
 def decline_flagged_post(pid):
     post = Post.query.get_or_404(pid)
-    post.status = "Declined"
+    _set_post_status(post, "Declined")
     post.reviewed_at = datetime.now(timezone.utc)
     post.review_msg = "Declined after flag review ❌"
     PostReport.query.filter_by(post_id=pid).delete()
     db.session.commit()
+    feed_cache.bump()
     return redirect(url_for('routes.admin_pending'))
 
+# Bulk counterparts of approve_post / decline_post / approve_flagged_post
+BULK_ACTIONS = {
+    "approve": ("Approved", "Approved ✅"),
+    "decline": ("Declined", "Declined ❌"),
+    "reapprove": (None, "Re-approved after flag review ✅"),
+}
+BULK_MAX_POSTS = 500
+
+@routes_bp.route("/admin/bulk-moderate", methods=["POST"])
+def bulk_moderate():
+    if session.get('user_role') != 'admin':
+        return jsonify({"status": "error", "message": "Unauthorized"}), 403
+    data = request.get_json(silent=True) or {}
+    action = data.get("action")
+    if action not in BULK_ACTIONS:
+        return jsonify({"status": "error", "message": "action must be one of: " + ", ".join(BULK_ACTIONS)}), 400
+    raw_ids = data.get("post_ids")
+    # Exact ints only: int() would accept True, 1.9 and "89" and moderate posts nobody picked
+    if not isinstance(raw_ids, list) or any(type(pid) is not int for pid in raw_ids):
+        return jsonify({"status": "error", "message": "post_ids must be a list of integers"}), 400
+    post_ids = sorted(set(raw_ids))
+    if not post_ids:
+        return jsonify({"status": "error", "message": "No post ids given"}), 400
+    if len(post_ids) > BULK_MAX_POSTS:
+        return jsonify({"status": "error", "message": f"At most {BULK_MAX_POSTS} posts per request"}), 400
+
+    new_status, review_msg = BULK_ACTIONS[action]
+    rows = db.session.execute(
+        select(Post.id, Post.created_by, Post.status, Post.upvotes, Post.downvotes).where(Post.id.in_(post_ids))
+    ).all()
+    found = [r.id for r in rows]
+    if not found:
+        return jsonify({"status": "error", "message": "No matching posts"}), 404
+
+    values = {"reviewed_at": datetime.now(timezone.utc), "review_msg": review_msg}
+    approved_delta = defaultdict(int)
+    if new_status is not None:
+        values["status"] = new_status
+        for r in rows:
+            was_approved = r.status == "Approved"
+            if was_approved != (new_status == "Approved"):
+                approved_delta[r.created_by] += 1 if new_status == "Approved" else -1
+    else:
+        values["report_count"] = 0
+
+    no_sync = {"synchronize_session": False}
+    db.session.execute(update(Post).where(Post.id.in_(found)).values(**values), execution_options=no_sync)
+    if action != "approve":
+        # Mirrors the single-post flagged actions, which clear the reports they resolve
+        db.session.execute(delete(PostReport).where(PostReport.post_id.in_(found)), execution_options=no_sync)
+    for author_id, delta in approved_delta.items():
+        if author_id is not None and delta:
+            bump_user_stats(author_id, approved=delta)
+    db.session.commit()
+    feed_cache.bump()
+
+    if new_status == "Approved":
+        for r in rows:
+            publish_post_counts(r.id, r.upvotes, r.downvotes)
+    # Only approvals can earn badges; check each such author once
+    awarded = {}
+    for author_id, delta in approved_delta.items():
+        if author_id is not None and delta > 0:
+            new_badges = evaluate_achievements(author_id)
+            if new_badges:
+                awarded[str(author_id)] = new_badges
+
+    return jsonify({
+        "status": "success",
+        "action": action,
+        "updated": len(found),
+        "missing": sorted(set(post_ids) - set(found)),
+        "authors": len({r.created_by for r in rows}),
+        "badges_awarded": awarded,
+    })
+
 @routes_bp.route("/admin")
 def admin_dashboard():
     if session.get('user_role') != 'admin':
         return redirect(url_for('auth.login_page'))
     
-    posts = Post.query.filter(Post.status.in_(["Approved", "admin"])).order_by(Post.upvotes.desc()).all()
-    
-    for post in posts:
-        if post.submitted_at and post.submitted_at.tzinfo is None:
-            post.submitted_at = post.submitted_at.replace(tzinfo=timezone.utc)
-        if post.reviewed_at and post.reviewed_at.tzinfo is None:
-            post.reviewed_at = post.reviewed_at.replace(tzinfo=timezone.utc)
+    posts = load_approved_feed()
     
     user_id = session.get("user_id")
     user_role = session.get("user_role")
@@ -306,22 +399,23 @@ def admin_dashboard():
     
     return render_template("admin_dashboard.html", posts=posts, reported_ids=reported_posts, show_report_count=(user_role == "admin"))
 
+@routes_bp.route("/admin/cache-stats")
+def cache_stats():
+    if session.get('user_role') != 'admin':
+        return jsonify({"status": "error", "message": "Unauthorized"}), 403
+    return jsonify(feed_cache.stats())
+
 @routes_bp.route("/admin/approved")
 def admin_approved():
-    posts = Post.query.filter_by(status="Approved").all()
-    
-    for post in posts:
-        if post.submitted_at and post.submitted_at.tzinfo is None:
-            post.submitted_at = post.submitted_at.replace(tzinfo=timezone.utc)
-        if post.reviewed_at and post.reviewed_at.tzinfo is None:
-            post.reviewed_at = post.reviewed_at.replace(tzinfo=timezone.utc)
+    posts = post_rows(Post.status == "Approved")
     
     user_id = session.get("user_id")
     user_role = session.get("user_role")
     reported_posts = []
     
     if user_id:
-        reported_posts = [r.post_id for r in PostReport.query.filter_by(reported_by=user_id).all()]
+        reported_posts = db.session.execute(
+            select(PostReport.post_id).where(PostReport.reported_by == user_id)).scalars().all()
     
     return render_template("approved.html", posts=posts, reported_ids=reported_posts, show_report_count=(user_role == "admin"))
 
@@ -329,29 +423,17 @@ def admin_approved():
 def admin_declined():
     posts = Post.query.filter_by(status="Declined").all()
 
-    for post in posts:
-        if post.submitted_at and post.submitted_at.tzinfo is None:
-            post.submitted_at = post.submitted_at.replace(tzinfo=timezone.utc)
-        if post.reviewed_at and post.reviewed_at.tzinfo is None:
-            post.reviewed_at = post.reviewed_at.replace(tzinfo=timezone.utc)
-    
     return render_template("declined.html", posts=posts)
 
 @routes_bp.route("/admin/all")
 @routes_bp.route("/admin/all/<status>")
 def all_posts(status=None):
     if status == "Flagged":
-        posts = Post.query.filter(Post.report_count > 0, Post.status == "Approved").all()
+        posts = post_rows(Post.report_count > 0, Post.status == "Approved")
     elif status:
-        posts = Post.query.filter_by(status=status).all()
+        posts = post_rows(Post.status == status)
     else:
-        posts = Post.query.all()
-    
-    for post in posts:
-        if post.submitted_at and post.submitted_at.tzinfo is None:
-            post.submitted_at = post.submitted_at.replace(tzinfo=timezone.utc)
-        if post.reviewed_at and post.reviewed_at.tzinfo is None:
-            post.reviewed_at = post.reviewed_at.replace(tzinfo=timezone.utc)
+        posts = post_rows()
     
     return render_template("all_posts.html", posts=posts, current_status=status)
 
@@ -390,12 +472,6 @@ def seed():
 def admin_queue():
     posts = Post.query.filter(Post.status.in_(["Pending", "Flagged"])).all()
     
-    for post in posts:
-        if post.submitted_at and post.submitted_at.tzinfo is None:
-            post.submitted_at = post.submitted_at.replace(tzinfo=timezone.utc)
-        if post.reviewed_at and post.reviewed_at.tzinfo is None:
-            post.reviewed_at = post.reviewed_at.replace(tzinfo=timezone.utc)
-    
     return render_template("pending.html", posts=posts)
 
 @routes_bp.route("/admin-approve/<int:pid>", methods=["POST"])
@@ -410,22 +486,17 @@ def decline(pid):
 
 def _review(pid, new_status, msg):
     p = Post.query.get_or_404(pid)
-    p.status = new_status
+    _set_post_status(p, new_status)
     p.reviewed_at = datetime.now(timezone.utc)
     p.review_msg = msg
     db.session.commit()
+    feed_cache.bump()
     flash_message(msg)
 
 @routes_bp.route("/admin-approved")
 def approved():
     posts = Post.query.filter_by(status="Approved").all()
     
-    for post in posts:
-        if post.submitted_at and post.submitted_at.tzinfo is None:
-            post.submitted_at = post.submitted_at.replace(tzinfo=timezone.utc)
-        if post.reviewed_at and post.reviewed_at.tzinfo is None:
-            post.reviewed_at = post.reviewed_at.replace(tzinfo=timezone.utc)
-    
     reported = session.setdefault("reported_ids", [])
     return render_template("approved.html", posts=posts, reported_ids=reported)
 
@@ -433,12 +504,6 @@ def approved():
 def declined():
     posts = Post.query.filter_by(status="Declined").all()
     
-    for post in posts:
-        if post.submitted_at and post.submitted_at.tzinfo is None:
-            post.submitted_at = post.submitted_at.replace(tzinfo=timezone.utc)
-        if post.reviewed_at and post.reviewed_at.tzinfo is None:
-            post.reviewed_at = post.reviewed_at.replace(tzinfo=timezone.utc)
-    
     return render_template("declined.html", posts=posts)
 
 @routes_bp.route("/admin-all")
@@ -446,12 +511,6 @@ def declined():
 def all_posts_new(status=None):
     posts = Post.query.filter_by(status=status).all() if status else Post.query.all()
     
-    for post in posts:
-        if post.submitted_at and post.submitted_at.tzinfo is None:
-            post.submitted_at = post.submitted_at.replace(tzinfo=timezone.utc)
-        if post.reviewed_at and post.reviewed_at.tzinfo is None:
-            post.reviewed_at = post.reviewed_at.replace(tzinfo=timezone.utc)
-    
     reported = session.setdefault("reported_ids", [])
     return render_template("all_posts.html", posts=posts, reported_ids=reported, current_status=status)
 
@@ -459,6 +518,7 @@ def all_posts_new(status=None):
 def submit():
     if request.method == "POST":
         db.session.add(Post(content=request.form["content"], status="Pending", submitted_at=datetime.now(timezone.utc), created_by=1))
+        bump_user_stats(1, submissions=1)
         db.session.commit()
         flash_message("Post submitted for review.")
         return redirect(url_for("routes.submit"))
@@ -507,15 +567,16 @@ def report(pid):
             post.report_count += 1
             
             if post.report_count >= 3:
-                post.status = "Declined"
+                _set_post_status(post, "Declined")
                 post.reviewed_at = datetime.now(timezone.utc)
                 post.review_msg = f"Auto-declined due to {post.report_count} reports"
                 flash(f"Post has been reported {post.report_count} times and has been automatically declined.", "warning")
             else:
-                post.status = "Approved"
+                _set_post_status(post, "Approved")
                 flash(f"Report submitted. Post has {post.report_count} report(s) and will be reviewed by admin.", "success")
             
             db.session.commit()
+            feed_cache.bump()
             if session.get("user_role") == "admin":
                 return redirect(url_for("routes.admin_approved"))
             else:
@@ -531,6 +592,17 @@ def report(pid):
     
     return render_template("report.html", already=existing_report is not None, post=post)
 
+SEARCH_PAGE_SIZE = 25
+SEARCH_PAGE_MAX = 100
+SUGGEST_LIMIT_MAX = 20
+
+@routes_bp.route("/admin/search-suggest", methods=["GET"])
+def admin_search_suggest():
+    if session.get("user_role") != "admin":
+        return jsonify({"status": "error", "message": "Unauthorized"}), 403
+    limit = min(max(request.args.get("limit", 8, type=int), 1), SUGGEST_LIMIT_MAX)
+    return jsonify({"suggestions": suggestions.suggest(request.args.get("q", ""), limit=limit)})
+
 @routes_bp.route("/admin/search-filter", methods=["GET"])
 def admin_search_filter():
     if session.get("user_role") != "admin":
@@ -539,12 +611,11 @@ def admin_search_filter():
     keyword = request.args.get("q", "").strip().lower()
     selected_categories = request.args.getlist("category")
     selected_statuses = request.args.getlist("status")
+    page = request.args.get("page", 1, type=int)
+    per_page = min(max(request.args.get("per_page", SEARCH_PAGE_SIZE, type=int), 1), SEARCH_PAGE_MAX)
 
     query = Post.query
 
-    if keyword:
-        query = query.filter(Post.content.ilike(f"%{keyword}%"))
-
     if selected_categories:
         query = query.filter(Post.category.in_(selected_categories))
 
@@ -554,76 +625,44 @@ def admin_search_filter():
         else:
             query = query.filter(Post.status.in_(selected_statuses))
 
-    posts = query.order_by(Post.submitted_at.desc()).all()
+    # Keyword matches come back best-first; a plain filter lists newest first
+    query = search.apply(query, keyword) if keyword else query.order_by(Post.submitted_at.desc())
+    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
 
     return render_template(
         "all_posts.html",
-        posts=posts,
+        posts=pagination.items,
+        pagination=pagination,
         selected_statuses=selected_statuses,
         selected_categories=selected_categories,
         current_status="Filtered"
     )
-@routes_bp.route('/upvote/<int:post_id>', methods=['POST'], endpoint='upvote_post')
-def upvote_post(post_id):
-    if 'user_id' not in session:
+def _handle_vote(post_id, vote_type):
+    user = load_current_user()
+    if user is None:
         return jsonify({'error': 'Not logged in'}), 403
 
-    user_id = session['user_id']
-    user = User.query.get_or_404(user_id)
-    post = Post.query.get_or_404(post_id)
-
-    existing_vote = UserVote.query.filter_by(user_id=user_id, post_id=post_id).first()
+    user_id = user.id
+    try:
+        result = cast_vote(user_id, post_id, vote_type)
+    except VoteConflict:
+        return jsonify({'error': 'Vote is being updated, please retry'}), 409
+    if result is None:
+        return jsonify({'error': 'Not found'}), 404
+    feed_cache.bump()
+    publish_post_counts(post_id, result['upvotes'], result['downvotes'])
 
-    if existing_vote:
-        if existing_vote.vote_type == 'upvote':
-            db.session.delete(existing_vote)
-            post.upvotes -= 1
-            user.points -= 1
-        else:
-            existing_vote.vote_type = 'upvote'
-            post.upvotes += 1
-            post.downvotes = max(0, post.downvotes - 1)
-            existing_vote.vote_type = 'upvote'
-            user.points += 1
-    else:
-        db.session.add(UserVote(user_id=user_id, post_id=post_id, vote_type='upvote'))
-        post.upvotes += 1
-        user.points += 1
+    evaluate_achievements(user_id)
+    return jsonify({'upvotes': result['upvotes'], 'downvotes': result['downvotes'], 'points': result['points']})
 
-    db.session.commit()
-    check_and_award_vote_badges(user_id)
-    return jsonify({'upvotes': post.upvotes, 'downvotes': post.downvotes, 'points': user.points})
+@routes_bp.route('/upvote/<int:post_id>', methods=['POST'], endpoint='upvote_post')
+def upvote_post(post_id):
+    return _handle_vote(post_id, 'upvote')
 
 
 @routes_bp.route('/downvote/<int:post_id>', methods=['POST'])
 def downvote_post(post_id):
-    if 'user_id' not in session:
-        return jsonify({'error': 'Not logged in'}), 403
-
-    user_id = session['user_id']
-    user = User.query.get_or_404(user_id)
-    post = Post.query.get_or_404(post_id)
-
-    existing_vote = UserVote.query.filter_by(user_id=user_id, post_id=post_id).first()
-
-    if existing_vote:
-        if existing_vote.vote_type == 'downvote':
-            db.session.delete(existing_vote)
-            post.downvotes = max(0, post.downvotes - 1)
-            user.points = max(0, user.points - 1)
-        else:
-            existing_vote.vote_type = 'downvote'
-            post.upvotes = max(0, post.upvotes - 1)
-            post.downvotes += 1
-            user.points += 1
-    else:
-        db.session.add(UserVote(user_id=user_id, post_id=post_id, vote_type='downvote'))
-        post.downvotes += 1
-        user.points += 1
-
-    db.session.commit()
-    check_and_award_vote_badges(user_id)
-    return jsonify({'upvotes': post.upvotes, 'downvotes': post.downvotes, 'points': user.points})
+    return _handle_vote(post_id, 'downvote')
 
 @routes_bp.route('/api/user_votes', methods=['GET'])
 def get_user_votes():
@@ -632,4 +671,9 @@ def get_user_votes():
         return jsonify({'error': 'Not logged in'}), 403
     votes = UserVote.query.filter_by(user_id=user_id).all()
     votes_dict = {vote.post_id: vote.vote_type for vote in votes}
-    return jsonify(votes_dict)
\ No newline at end of file
+    # Tagged by the votes themselves: one indexed read saves sending the map again
+    etag = _feed_etag("user_votes", user_id, sorted(votes_dict.items()))
+    not_modified = _not_modified(etag)
+    if not_modified:
+        return not_modified
+    return _with_etag(jsonify(votes_dict), etag)
\ No newline at end of file
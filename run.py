@@ -1,6 +1,4 @@
-from app import create_app
-
-app = create_app()
+from app import app
 
 if __name__ == '__main__':
     #app.run(debug=True, host='0.0.0.0', port=5001)
@@ -0,0 +1,133 @@
+# Description: keyword search over post content for the admin search page.
+# Each backend narrows a Post query to the matching rows and orders them by
+# relevance, so callers keep adding their own filters and paginating:
+#
+#   LikeSearch         -> ILIKE '%kw%' (any database, full scan; the fallback)
+#   SqliteFtsSearch    -> FTS5 table posts_fts ranked with bm25()
+#   MysqlFulltextSearch-> FULLTEXT index ft_posts_content, MATCH ... AGAINST
+#
+# The indexes are created by `python migrations.py`; until then search falls
+# back to LIKE. Only content is indexed (status and category are filtered on
+# the posts table), and both engines keep the index in step with the table on
+# their own: InnoDB maintains FULLTEXT transactionally and the FTS5 table is
+# fed by triggers, so bulk UPDATEs and imports stay searchable too.
+
+import re
+from flask import current_app
+from sqlalchemy import text, select, func, literal_column, table, column
+from sqlalchemy.dialects.mysql import match
+from extensions import db
+from model import Post
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+class LikeSearch:
+    name = "like"
+
+    def available(self, conn):
+        return True
+
+    def apply(self, query, keyword):
+        return query.filter(Post.content.ilike(f"%{keyword}%")).order_by(Post.submitted_at.desc())
+
+
+class SqliteFtsSearch:
+    name = "fts5"
+    fts = table("posts_fts", column("rowid"))
+
+    DDL = [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(content, content='posts', content_rowid='id')",
+        """CREATE TRIGGER IF NOT EXISTS posts_fts_ai AFTER INSERT ON posts BEGIN
+             INSERT INTO posts_fts(rowid, content) VALUES (new.id, new.content);
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS posts_fts_ad AFTER DELETE ON posts BEGIN
+             INSERT INTO posts_fts(posts_fts, rowid, content) VALUES ('delete', old.id, old.content);
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS posts_fts_au AFTER UPDATE OF content ON posts BEGIN
+             INSERT INTO posts_fts(posts_fts, rowid, content) VALUES ('delete', old.id, old.content);
+             INSERT INTO posts_fts(rowid, content) VALUES (new.id, new.content);
+           END""",
+    ]
+
+    def available(self, conn):
+        return conn.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'posts_fts'")).first() is not None
+
+    def create_index(self, conn):
+        for ddl in self.DDL:
+            conn.execute(text(ddl))
+        # Index the rows that existed before the triggers did
+        conn.execute(text("INSERT INTO posts_fts(posts_fts) VALUES ('rebuild')"))
+
+    def apply(self, query, keyword):
+        # Quote every token so user input can't inject FTS5 syntax; the trailing *
+        # makes each a prefix match, closer to what the old substring search found.
+        tokens = _TOKEN.findall(keyword)
+        if not tokens:
+            return LikeSearch().apply(query, keyword)
+        expr = " ".join('"%s"*' % t for t in tokens)
+        hits = (select(self.fts.c.rowid.label("post_id"), func.bm25(literal_column("posts_fts")).label("rank"))
+                .select_from(self.fts)
+                .where(literal_column("posts_fts").op("MATCH")(expr))
+                .subquery())
+        # bm25() is lower-is-better
+        return query.join(hits, hits.c.post_id == Post.id).order_by(hits.c.rank, Post.id.desc())
+
+
+class MysqlFulltextSearch:
+    name = "fulltext"
+    index_name = "ft_posts_content"
+    # InnoDB ignores tokens shorter than innodb_ft_min_token_size (3 by default)
+    min_token = 3
+
+    def available(self, conn):
+        return any(ix["name"] == self.index_name for ix in db.inspect(conn).get_indexes("posts"))
+
+    def create_index(self, conn):
+        conn.execute(text(f"CREATE FULLTEXT INDEX {self.index_name} ON posts (content)"))
+
+    def apply(self, query, keyword):
+        if not any(len(t) >= self.min_token for t in _TOKEN.findall(keyword)):
+            return LikeSearch().apply(query, keyword)
+        score = match(Post.content, against=keyword).in_natural_language_mode()
+        return query.filter(score > 0).order_by(score.desc(), Post.id.desc())
+
+
+NATIVE_BACKENDS = {"sqlite": SqliteFtsSearch, "mysql": MysqlFulltextSearch}
+
+
+def native_backend(dialect_name):
+    """The indexed backend for a database dialect, or None if it has none."""
+    backend = NATIVE_BACKENDS.get(dialect_name)
+    return backend() if backend else None
+
+
+class SearchService:
+    """Picks a backend once per process and applies it to post queries."""
+
+    def __init__(self):
+        self._backend = None
+
+    def backend(self):
+        if self._backend is None:
+            chosen = LikeSearch()
+            native = None
+            if current_app.config.get("SEARCH_BACKEND", "auto") != "like":
+                native = native_backend(db.engine.dialect.name)
+            if native is not None:
+                with db.engine.connect() as conn:
+                    if native.available(conn):
+                        chosen = native
+                    else:
+                        current_app.logger.warning(
+                            "Search index missing, using LIKE search; run `python migrations.py` to build it")
+            self._backend = chosen
+        return self._backend
+
+    def apply(self, query, keyword):
+        """Restrict ``query`` to posts matching ``keyword``, best matches first."""
+        return self.backend().apply(query, keyword)
+
+
+search = SearchService()
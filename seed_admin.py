@@ -1,9 +1,8 @@
 from extensions import db
 from model import User
+from current_user import identity_cache
 from werkzeug.security import generate_password_hash, check_password_hash
-from app import create_app
-
-app = create_app()
+from app import app
 
 with app.app_context():
     admin_email = "admin1@example.com"
@@ -30,6 +29,8 @@ with app.app_context():
         db.session.add(user)
 
     db.session.commit()
+    # Running workers pick the new role up within USER_CACHE_TTL
+    identity_cache.invalidate(user.id)
 
     # Pull fresh from DB and test again
     fresh_user = User.query.filter_by(email=admin_email).first()
@@ -7,12 +7,15 @@
 
 const DataModel = {
     items: [],  // Placeholder for data fetched from the API
+    validators: {},  // url -> { etag, data } from the last full response, used for conditional GETs
     baseUrl: `${window.location.protocol}//${window.location.host}/`,  // Base URL dynamically generated for API requests
 
     /**
      * Helper function for making authenticated API requests with retries.
      * This function sends a request to the given URL using the provided options.
      * It automatically adds the Authorization header with the JWT token from local storage.
+     * GET responses that carry an ETag are remembered; the next GET of the same URL sends
+     * If-None-Match and a 304 Not Modified answer returns the remembered data.
      * If the request fails, it retries up to 3 times before throwing an error.
      *
      * IMPORTANT: Use this to make API calls in all of your functions below.
@@ -26,16 +29,29 @@ const DataModel = {
             'Authorization': `Bearer ${localStorage.getItem('jwtToken')}`,  // Add JWT token for authentication
             'Content-Type': 'application/json',  // Ensure the request sends and receives JSON
         };
+        const isGet = !options.method || options.method.toUpperCase() === 'GET';
+        const cached = isGet ? this.validators[url] : undefined;
+        if (cached) {
+            headers['If-None-Match'] = cached.etag;  // Let the server answer 304 if nothing changed
+        }
         options.headers = headers;
 
         // Retry logic: attempt the request up to 3 times
         for (let attempt = 1; attempt <= 3; attempt++) {
             try {
                 const response = await fetch(url, options);  // Send the request using fetch
+                if (response.status === 304 && cached) {
+                    return cached.data;  // Unchanged since our last copy
+                }
                 if (!response.ok) {
                     throw new Error(`HTTP error! Status: ${response.status}`);  // Throw an error if response is not OK
                 }
-                return await response.json();  // Parse and return the response JSON if successful
+                const data = await response.json();  // Parse the response JSON if successful
+                const etag = response.headers.get('ETag');
+                if (isGet && etag) {
+                    this.validators[url] = { etag: etag, data: data };
+                }
+                return data;
             } catch (error) {
                 if (attempt === 3) {
                     // If this is the third and final attempt, rethrow the error
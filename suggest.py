@@ -0,0 +1,203 @@
+# Description: in-process trigram index behind the admin search box's
+# search-as-you-type suggestions, so a keystroke never reaches the database.
+#
+# Every word of a post's content and category is padded ("  coffee ") and split
+# into trigrams; each trigram maps to an array('I') of post ids in ascending
+# order (4 bytes per entry). A query word becomes the trigrams of its padded
+# prefix ("  cof"), so it matches posts with a word starting that way. Candidates
+# come from intersecting the posting lists, newest first, and are confirmed
+# against the post's sorted tuple of distinct (interned) words to drop trigram
+# collisions. Posts are never edited or deleted, so that tuple stays accurate.
+#
+# The index is built in a background task after startup, in primary-key
+# batches that yield between them, and serves no suggestions until it is
+# ready. From then on the routes that create posts add to it, and the same
+# task picks up posts created by other gunicorn workers with a catch-up query
+# (id > highest indexed id) every refresh_interval.
+
+import re
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from extensions import db, socketio
+from model import Post
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+# Keystroke input is cut down to this before it is split into words
+MAX_QUERY_LENGTH = 100
+MAX_QUERY_WORDS = 8
+
+
+def _trigrams(word, prefix=False):
+    padded = "  " + word + ("" if prefix else " ")
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _contains(postings, post_id):
+    i = bisect_left(postings, post_id)
+    return i < len(postings) and postings[i] == post_id
+
+
+def _has_word(words, word, prefix=False):
+    """Whether the sorted ``words`` hold ``word`` (or, with ``prefix``, a word starting with it)."""
+    i = bisect_left(words, word)
+    if i == len(words):
+        return False
+    return words[i].startswith(word) if prefix else words[i] == word
+
+
+class SuggestionIndex:
+    """Trigram index over post content and category."""
+
+    def __init__(self, refresh_interval=2.0, snippet_length=80, build_batch=2000, max_cached_words=50000):
+        self.enabled = True
+        self.ready = False
+        self.refresh_interval = refresh_interval
+        self.snippet_length = snippet_length
+        self.build_batch = build_batch
+        self.max_cached_words = max_cached_words
+        self._postings = {}  # trigram -> array('I') of post ids, ascending
+        self._docs = {}      # post id -> (category, snippet, sorted tuple of its distinct words)
+        self._word_grams = {}  # word -> its trigrams, so common words are split once; at most max_cached_words
+        self._max_id = 0
+        # Guards _postings, _docs and _word_grams; readers take it too, since _add grows arrays in place
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.enabled = app.config.get('SUGGEST_INDEX_ENABLED', True)
+        self.refresh_interval = app.config.get('SUGGEST_REFRESH_INTERVAL', self.refresh_interval)
+        if self.enabled:
+            socketio.start_background_task(self._build, app)
+
+    def _build(self, app):
+        """Index every post in id order, yielding between batches so requests keep being served,
+        then keep catching up with posts other workers create."""
+        with app.app_context():
+            started = time.perf_counter()
+            last_id = 0
+            try:
+                while True:
+                    rows = db.session.execute(
+                        db.select(Post.id, Post.category, Post.content)
+                        .where(Post.id > last_id).order_by(Post.id).limit(self.build_batch)
+                    ).all()
+                    db.session.rollback()  # don't hold a read transaction open across batches
+                    if not rows:
+                        break
+                    with self._lock:
+                        for post_id, category, content in rows:
+                            self._add(post_id, category, content)
+                    last_id = rows[-1][0]
+                    socketio.sleep(0)
+            except Exception:
+                app.logger.exception("Suggestion index build failed; suggestions stay off")
+                return
+            finally:
+                db.session.remove()
+            self.ready = True
+            app.logger.info("Suggestion index: %d posts, %d trigrams in %.2fs",
+                            len(self._docs), len(self._postings), time.perf_counter() - started)
+
+            while self.enabled:
+                socketio.sleep(self.refresh_interval)
+                try:
+                    self.catch_up()
+                except Exception:
+                    app.logger.exception("Suggestion index catch-up failed")
+                finally:
+                    db.session.remove()
+
+    def add(self, post_id, category, content):
+        """Index one post just created by this worker (repeats are ignored).
+
+        Before the build finishes this is a no-op: the build, or the first
+        catch-up after it, reads the post from the table instead.
+        """
+        if not self.enabled or not self.ready or not post_id:
+            return
+        with self._lock:
+            self._add(post_id, category, content)
+
+    def _add(self, post_id, category, content):
+        if post_id in self._docs:
+            return
+        words = sorted({sys.intern(word) for word in _WORD.findall(f"{category or ''} {content or ''}".lower())})
+        grams = set()
+        word_grams = self._word_grams
+        for word in words:
+            cached = word_grams.get(word)
+            if cached is None:
+                cached = _trigrams(word)
+                if len(word_grams) < self.max_cached_words:
+                    word_grams[word] = cached
+            grams |= cached
+        # An id below the highest indexed one (a concurrent insert that committed
+        # late) has to be inserted in place to keep the lists sorted
+        in_order = post_id > self._max_id
+        all_postings = self._postings
+        for gram in grams:
+            postings = all_postings.get(gram)
+            if postings is None:
+                postings = all_postings[gram] = array('I')
+            if in_order:
+                postings.append(post_id)
+            else:
+                postings.insert(bisect_left(postings, post_id), post_id)
+        snippet = (content or "")[:self.snippet_length]
+        self._docs[post_id] = (category, snippet, tuple(words))
+        self._max_id = max(self._max_id, post_id)
+
+    def catch_up(self):
+        """Index every post newer than the highest id seen; returns how many were added."""
+        rows = db.session.execute(
+            db.select(Post.id, Post.category, Post.content)
+            .where(Post.id > self._max_id).order_by(Post.id)
+        ).all()
+        with self._lock:
+            for post_id, category, content in rows:
+                self._add(post_id, category, content)
+        return len(rows)
+
+    def suggest(self, query, limit=8):
+        """Posts whose words start with every word of ``query``, newest first."""
+        words = _WORD.findall(query[:MAX_QUERY_LENGTH].lower())[:MAX_QUERY_WORDS]
+        if not words or not self.enabled or not self.ready:
+            return []
+
+        # Earlier words are complete; the last one is still being typed
+        grams = set()
+        for word in words[:-1]:
+            grams |= _trigrams(word)
+        grams |= _trigrams(words[-1], prefix=True)
+        checks = [(word, i == len(words) - 1) for i, word in enumerate(words)]
+
+        results = []
+        with self._lock:
+            lists = [self._postings.get(g) for g in grams]
+            if not all(lists):
+                return []
+            lists.sort(key=len)
+            smallest, others = lists[0], lists[1:]
+            for post_id in reversed(smallest):
+                if not all(_contains(other, post_id) for other in others):
+                    continue
+                category, snippet, doc_words = self._docs[post_id]
+                if all(_has_word(doc_words, word, prefix) for word, prefix in checks):
+                    results.append({"id": post_id, "category": category, "snippet": snippet})
+                    if len(results) >= limit:
+                        break
+        return results
+
+    def stats(self):
+        return {
+            "ready": self.ready,
+            "posts": len(self._docs),
+            "trigrams": len(self._postings),
+            "postings": sum(len(p) for p in self._postings.values()),
+        }
+
+
+suggestions = SuggestionIndex()
@@ -0,0 +1,95 @@
+# Description: shared pytest fixtures. Each test gets a fresh SQLite database
+# (migrated by create_app, since SCHEMA_AUTO_MIGRATE defaults on for SQLite)
+# and clean process-wide caches.
+
+import os
+import sys
+import tempfile
+
+# app.py builds an app at import time; point it at a throwaway database first
+os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "import.db")
+os.environ.setdefault("SUGGEST_INDEX_ENABLED", "false")
+os.environ.setdefault("SECRET_KEY", "test-secret-key-that-is-long-enough-for-hs256")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from sqlalchemy import event
+from datetime import datetime, timezone
+from werkzeug.security import generate_password_hash
+from app import create_app
+from extensions import db
+from model import User, Post
+from feed_cache import feed_cache
+from current_user import identity_cache
+from achievements import invalidate_rules
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setenv("SQLALCHEMY_DATABASE_URI", f"sqlite:///{tmp_path / 'app.db'}")
+    app = create_app()
+    app.config["TESTING"] = True
+    feed_cache.bump()
+    identity_cache.clear()
+    invalidate_rules()
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+@pytest.fixture
+def users(app):
+    """(admin id, user id); both have the password 'pw'."""
+    password = generate_password_hash("pw", method="pbkdf2:sha256:1000")
+    with app.app_context():
+        admin = User(email="admin@example.com", name="Ada Admin", password=password, role="admin", points=0)
+        user = User(email="user@example.com", name="Una User", password=password, role="user", points=0)
+        db.session.add_all([admin, user])
+        db.session.commit()
+        return admin.id, user.id
+
+
+@pytest.fixture
+def make_posts(app, users):
+    """make_posts(n, status, **fields) adds n posts by the regular user and returns their ids."""
+    def make(n, status="Approved", **fields):
+        now = datetime.now(timezone.utc)
+        with app.app_context():
+            posts = [Post(**{"content": f"post {i} about the coffee machine", "category": "HR", "status": status,
+                             "upvotes": i % 7, "downvotes": 0, "report_count": 0, "created_by": users[1],
+                             "created_at": now, "submitted_at": now, "reviewed_at": now, **fields}) for i in range(n)]
+            db.session.add_all(posts)
+            db.session.commit()
+            return [p.id for p in posts]
+    return make
+
+
+@pytest.fixture
+def login(app):
+    """login(user_id, role) -> a test client with that user's session."""
+    def make_client(user_id, role):
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session["user_id"] = user_id
+            session["user_role"] = role
+        return client
+    return make_client
+
+
+@pytest.fixture
+def statements(app):
+    """statements(fn) -> the SQL statements fn() executed, in order."""
+    def record(fn):
+        executed = []
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            executed.append(statement.lstrip())
+
+        with app.app_context():
+            event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+            try:
+                fn()
+            finally:
+                event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+        return executed
+    return record
@@ -0,0 +1,51 @@
+from sqlalchemy import select
+from extensions import db
+from model import Achievement, Post, UserBadge, UserStats
+from user_stats import get_user_stats
+from achievements import backfill_badges, evaluate_achievements, invalidate_rules
+
+
+def _badges(user_id):
+    return set(db.session.execute(select(UserBadge.badge_name).where(UserBadge.user_id == user_id)).scalars())
+
+
+def test_backfill_recounts_stats_in_place_and_awards_missing_badges(app, users, make_posts):
+    admin_id, user_id = users
+    make_posts(2, status="Approved")
+    make_posts(1, status="Pending")
+    with app.app_context():
+        # A drifted row for the user, no row at all for the admin
+        db.session.add(UserStats(user_id=user_id, vote_count=7, submission_count=0, approved_count=0))
+        db.session.commit()
+
+        assert backfill_badges(chunk_size=1, report=lambda line: None) == (2, 2)
+        assert get_user_stats(user_id) == (0, 3, 2)
+        assert get_user_stats(admin_id) == (0, 0, 0)
+        assert _badges(user_id) == {"First Submission", "First Post"}
+        assert _badges(admin_id) == set()
+
+        # A second run finds nothing left to award
+        assert backfill_badges(report=lambda line: None) == (2, 0)
+
+
+def test_rules_are_read_from_the_achievements_table(app, users, make_posts):
+    user_id = users[1]
+    make_posts(2, status="Approved")
+    with app.app_context():
+        evaluate_achievements(user_id)  # caches the default rule set
+        db.session.add(Achievement(name="Prolific", category="approved", threshold=2))
+        db.session.add(Achievement(name="Unreachable", category="approved", threshold=3))
+        db.session.commit()
+
+        # The rule set is cached per process until invalidated
+        evaluate_achievements(user_id)
+        assert "Prolific" not in _badges(user_id)
+        invalidate_rules()
+        assert "Prolific" in evaluate_achievements(user_id)
+        assert "Unreachable" not in _badges(user_id)
+
+        db.session.execute(Achievement.__table__.update().where(Achievement.name == "Unreachable").values(threshold=2))
+        db.session.execute(UserBadge.__table__.delete().where(UserBadge.user_id == user_id))
+        db.session.commit()
+        backfill_badges(report=lambda line: None)  # re-reads the table itself
+        assert {"Prolific", "Unreachable"} <= _badges(user_id)
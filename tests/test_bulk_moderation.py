@@ -0,0 +1,61 @@
+import pytest
+from sqlalchemy import select
+import routes
+from extensions import db
+from model import Post, User
+
+
+@pytest.fixture
+def second_author(app):
+    with app.app_context():
+        user = User(email="other@example.com", name="Otto Other", password="x", role="user", points=0)
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+
+def _statuses(app, post_ids):
+    with app.app_context():
+        return dict(db.session.execute(select(Post.id, Post.status).where(Post.id.in_(post_ids))).all())
+
+
+def test_bulk_approve_is_one_update_and_reports_missing_ids(app, users, login, make_posts, statements,
+                                                            second_author, monkeypatch):
+    first = make_posts(3, status="Pending")
+    second = make_posts(2, status="Pending", created_by=second_author)
+    evaluated = []
+    monkeypatch.setattr(routes, "evaluate_achievements", lambda user_id: evaluated.append(user_id) or [])
+    admin = login(users[0], "admin")
+    response = None
+
+    def moderate():
+        nonlocal response
+        response = admin.post("/admin/bulk-moderate", json={"action": "approve",
+                                                            "post_ids": first + second + [9999, first[0]]})
+
+    executed = statements(moderate)
+    body = response.get_json()
+    assert response.status_code == 200
+    assert body["updated"] == 5 and body["missing"] == [9999] and body["authors"] == 2
+    assert len([sql for sql in executed if sql.upper().startswith("UPDATE POSTS")]) == 1
+    assert set(_statuses(app, first + second).values()) == {"Approved"}
+    # Badges are checked once per author, not once per post
+    assert sorted(evaluated) == sorted([users[1], second_author])
+
+
+@pytest.mark.parametrize("payload", [
+    {"action": "approve", "post_ids": "89"},
+    {"action": "approve", "post_ids": 8},
+    {"action": "approve", "post_ids": ["8"]},
+    {"action": "approve", "post_ids": [True]},
+    {"action": "approve", "post_ids": [1.5]},
+    {"action": "approve", "post_ids": [None]},
+    {"action": "approve", "post_ids": []},
+    {"action": "approve"},
+    {"action": "delete", "post_ids": [1]},
+])
+def test_bulk_moderate_rejects_bad_payloads(app, users, login, make_posts, payload):
+    post_ids = make_posts(9, status="Pending")
+    response = login(users[0], "admin").post("/admin/bulk-moderate", json=payload)
+    assert response.status_code == 400
+    assert set(_statuses(app, post_ids).values()) == {"Pending"}
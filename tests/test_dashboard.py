@@ -0,0 +1,23 @@
+from extensions import db
+from model import PostReport
+from votes import cast_vote
+
+
+def test_warm_dashboard_runs_two_statements_and_renders_my_votes(app, users, login, make_posts, statements):
+    up, down, reported = make_posts(3)
+    with app.app_context():
+        cast_vote(users[1], up, "upvote")
+        cast_vote(users[1], down, "downvote")
+        db.session.add(PostReport(post_id=reported, reported_by=users[1], reason="spam"))
+        db.session.commit()
+    client = login(users[1], "user")
+    client.get("/dashboard")  # fills the feed cache
+
+    responses = []
+    assert len(statements(lambda: responses.append(client.get("/dashboard")))) == 2
+    html = responses[0].get_data(as_text=True)
+    assert f"upvote-btn upvoted\" onclick=\"vote('upvote', '{up}'" in html
+    assert f"downvote-btn downvoted\" onclick=\"vote('downvote', '{down}'" in html
+    assert html.count(" upvoted\"") == 1 and html.count(" downvoted\"") == 1
+    assert "You reported this post" in html
+    assert "/api/user_votes" not in html
@@ -0,0 +1,47 @@
+from sqlalchemy import update
+from extensions import db
+from feed_cache import feed_cache
+from model import Post
+
+
+def _get(client, url, etag=None):
+    return client.get(url, headers={"If-None-Match": etag} if etag else {})
+
+
+def test_matching_if_none_match_gets_304(app, users, login, make_posts):
+    make_posts(3)
+    client = login(users[1], "user")
+    for url in ("/api/approved_posts", "/api/user_votes"):
+        first = _get(client, url)
+        etag = first.headers["ETag"]
+        assert first.status_code == 200 and etag.startswith('W/"')
+        again = _get(client, url, etag)
+        assert again.status_code == 304 and again.headers["ETag"] == etag and not again.data
+
+
+def test_vote_changes_the_etags(app, users, login, make_posts):
+    post_id = make_posts(3)[0]
+    client = login(users[1], "user")
+    feed = _get(client, "/api/approved_posts").headers["ETag"]
+    votes = _get(client, "/api/user_votes").headers["ETag"]
+
+    assert client.post(f"/upvote/{post_id}").status_code == 200
+    assert _get(client, "/api/approved_posts", feed).status_code == 200
+    assert _get(client, "/api/user_votes", votes).status_code == 200
+
+
+def test_etag_is_derived_from_data_not_the_process(app, users, login, make_posts):
+    post_id = make_posts(3)[0]
+    client = login(users[1], "user")
+    etag = _get(client, "/api/approved_posts").headers["ETag"]
+
+    # An empty cache, as in another worker, hands out the same tag for the same rows
+    feed_cache.bump()
+    assert _get(client, "/api/approved_posts", etag).status_code == 304
+
+    # A change made elsewhere shows up once the cached page is reloaded
+    with app.app_context():
+        db.session.execute(update(Post).where(Post.id == post_id).values(upvotes=Post.upvotes + 5))
+        db.session.commit()
+    feed_cache.bump()
+    assert _get(client, "/api/approved_posts", etag).status_code == 200
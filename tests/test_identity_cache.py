@@ -0,0 +1,42 @@
+import time
+from sqlalchemy import update
+from extensions import db
+from model import User
+from current_user import IdentityCache, Identity, get_identity, identity_cache
+
+
+def _set_role(app, user_id, role):
+    with app.app_context():
+        db.session.execute(update(User).where(User.id == user_id).values(role=role))
+        db.session.commit()
+
+
+def test_cache_hit_skips_the_query_until_invalidated(app, users, statements):
+    user_id = users[1]
+    with app.app_context():
+        assert get_identity(user_id) == Identity(user_id, "user", "Una User")
+    _set_role(app, user_id, "admin")
+    with app.app_context():
+        assert statements(lambda: get_identity(user_id)) == []
+        assert get_identity(user_id).role == "user"  # still the cached role
+        identity_cache.invalidate(user_id)
+        assert get_identity(user_id).role == "admin"
+
+
+def test_entries_expire_after_the_ttl():
+    cache = IdentityCache(ttl=0.05)
+    cache.put(Identity(1, "user", "Una"))
+    assert cache.get(1) == Identity(1, "user", "Una")
+    time.sleep(0.06)
+    assert cache.get(1) is None
+
+
+def test_zero_ttl_disables_the_cache(app, users, statements, monkeypatch):
+    app.config["USER_CACHE_TTL"] = 0
+    monkeypatch.setattr(identity_cache, "ttl", identity_cache.ttl)  # restored after the test
+    identity_cache.init_app(app)
+    user_id = users[1]
+    with app.app_context():
+        get_identity(user_id)
+        assert len(statements(lambda: get_identity(user_id))) == 1
+    assert identity_cache.get(user_id) is None
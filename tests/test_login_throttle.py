@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import update
+from app import create_app
+from extensions import db
+from login_throttle import login_throttle
+from model import User
+
+
+def _fail_logins(client, times, **headers):
+    # A different email each time, so only the per-IP limit can trip
+    for i in range(times):
+        client.post("/login", data={"email": f"nobody{i}@example.com", "password": "wrong"}, headers=headers)
+
+
+def test_ip_limit_uses_forwarded_client_address_behind_a_proxy(tmp_path, monkeypatch):
+    monkeypatch.setenv("SQLALCHEMY_DATABASE_URI", f"sqlite:///{tmp_path / 'app.db'}")
+    monkeypatch.setenv("PROXY_FIX_X_FOR", "1")
+    client = create_app().test_client()
+
+    _fail_logins(client, login_throttle.ip_max_failures, **{"X-Forwarded-For": "203.0.113.7"})
+    assert login_throttle.blocked("someone@example.com", "203.0.113.7")
+    # Another client behind the same router is not affected
+    assert not login_throttle.blocked("someone@example.com", "198.51.100.2")
+
+
+def test_forwarded_header_is_ignored_without_a_trusted_proxy(app):
+    client = app.test_client()
+    _fail_logins(client, login_throttle.ip_max_failures, **{"X-Forwarded-For": "203.0.113.7"})
+    assert not login_throttle.blocked("someone@example.com", "203.0.113.7")
+    assert login_throttle.blocked("someone@example.com", "127.0.0.1")
+
+
+def _lock_state(app, user_id):
+    with app.app_context():
+        user = db.session.get(User, user_id)
+        return user.failed_attempts, user.locked_until
+
+
+def test_email_lock_is_written_honoured_and_cleared(app, users):
+    user_id = users[1]
+    client = app.test_client()
+    for _ in range(login_throttle.max_failures - 1):
+        client.post("/login", data={"email": "user@example.com", "password": "wrong"})
+    # Failures below the limit are only counted in memory
+    assert _lock_state(app, user_id) == (0, None)
+
+    client.post("/login", data={"email": "user@example.com", "password": "wrong"})
+    attempts, locked_until = _lock_state(app, user_id)
+    assert attempts == login_throttle.max_failures
+    assert locked_until > datetime.now(timezone.utc)
+
+    # A worker that never saw the failures still refuses the right password
+    login_throttle.init_app(app)
+    response = client.post("/login", data={"email": "user@example.com", "password": "pw"})
+    assert response.headers["Location"].endswith("/login")
+    assert _lock_state(app, user_id)[1] == locked_until
+
+    # Once the lock has run out, a successful login clears it
+    with app.app_context():
+        db.session.execute(update(User).where(User.id == user_id)
+                           .values(locked_until=datetime.now(timezone.utc) - timedelta(seconds=1)))
+        db.session.commit()
+    response = client.post("/login", data={"email": "user@example.com", "password": "pw"})
+    assert not response.headers["Location"].endswith("/login")
+    assert _lock_state(app, user_id) == (0, None)
@@ -0,0 +1,84 @@
+import threading
+import pytest
+from datetime import datetime, timezone
+from sqlalchemy import create_engine, select, insert, text
+from sqlalchemy.exc import IntegrityError
+from extensions import db
+from migrations import (migrate, check_schema, schema_version, schema_version_table, create_tables,
+                        LATEST_VERSION)
+from achievements import DEFAULT_ACHIEVEMENTS
+from model import Achievement
+
+
+def test_new_database_is_migrated_and_seeded(app):
+    with app.app_context():
+        assert schema_version(db.engine) == LATEST_VERSION
+        names = db.session.execute(select(Achievement.name)).scalars().all()
+    assert sorted(names) == sorted(r.name for r in DEFAULT_ACHIEVEMENTS)
+
+
+def test_duplicate_achievements_are_merged_before_names_become_unique(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    create_tables(engine)
+    schema_version_table.create(engine)
+    with engine.begin() as conn:
+        # The achievements table as it was before names were unique, after two racing seeds
+        conn.execute(text("DROP TABLE achievements"))
+        conn.execute(text("CREATE TABLE achievements (id INTEGER PRIMARY KEY, name VARCHAR(50) NOT NULL, "
+                          "category VARCHAR(20) NOT NULL, threshold INTEGER NOT NULL)"))
+        conn.execute(insert(Achievement.__table__), [r._asdict() for r in DEFAULT_ACHIEVEMENTS * 2])
+        conn.execute(insert(schema_version_table), [
+            {"version": v, "description": "before", "applied_at": datetime.now(timezone.utc)} for v in range(1, 5)])
+
+    assert migrate(engine, report=lambda line: None) == list(range(5, LATEST_VERSION + 1))
+    with engine.begin() as conn:
+        names = conn.execute(select(Achievement.name)).scalars().all()
+        assert sorted(names) == sorted(r.name for r in DEFAULT_ACHIEVEMENTS)
+        with pytest.raises(IntegrityError):
+            conn.execute(insert(Achievement.__table__).values(name="First Vote", category="votes", threshold=1))
+
+
+def _boot_app(monkeypatch, tmp_path, auto_migrate):
+    monkeypatch.setenv("SQLALCHEMY_DATABASE_URI", f"sqlite:///{tmp_path / 'boot.db'}")
+    monkeypatch.setenv("SCHEMA_AUTO_MIGRATE", auto_migrate)
+    from app import create_app
+    return create_app()
+
+
+def test_check_schema_migrates_when_auto_migrate_is_on(tmp_path, monkeypatch):
+    app = _boot_app(monkeypatch, tmp_path, "true")
+    with app.app_context():
+        assert check_schema(app)
+        assert schema_version(db.engine) == LATEST_VERSION
+        db.engine.dispose()
+
+
+def test_check_schema_refuses_an_old_schema_when_auto_migrate_is_off(tmp_path, monkeypatch, caplog):
+    app = _boot_app(monkeypatch, tmp_path, "false")
+    with app.app_context():
+        assert not check_schema(app)
+        assert schema_version(db.engine) == 0
+        assert "flask --app app migrate" in caplog.text
+        db.engine.dispose()
+
+
+def test_concurrent_migrations_apply_each_step_once(tmp_path):
+    url = f"sqlite:///{tmp_path / 'shared.db'}"
+    results, errors = [], []
+
+    def worker():
+        engine = create_engine(url, connect_args={"timeout": 30})
+        try:
+            results.append(migrate(engine, report=lambda line: None))
+        except Exception as exc:
+            errors.append(exc)
+        finally:
+            engine.dispose()
+
+    threads = [threading.Thread(target=worker) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert sorted(results) == [[], list(range(1, LATEST_VERSION + 1))]
@@ -0,0 +1,43 @@
+import pytest
+from sqlalchemy import update
+from extensions import db
+from model import Post, PostReport
+
+
+@pytest.fixture
+def count_selects(statements):
+    """count_selects(fn) -> how many SELECT statements fn() executed."""
+    return lambda fn: sum(sql.upper().startswith("SELECT") for sql in statements(fn))
+
+
+@pytest.fixture
+def moderation_queue(app, users, make_posts):
+    make_posts(150, status="Pending")
+    flagged = make_posts(150, status="Approved")
+    with app.app_context():
+        db.session.execute(update(Post).where(Post.id.in_(flagged)).values(report_count=2))
+        db.session.add_all([PostReport(post_id=pid, reported_by=reporter, reason=reason)
+                            for pid in flagged for reporter, reason in zip(users, ("spam", "off topic"))])
+        db.session.commit()
+
+
+@pytest.mark.parametrize("per_page", [5, 100])
+def test_admin_pending_query_count_does_not_grow_with_page_size(app, users, login, moderation_queue,
+                                                                 count_selects, per_page):
+    admin = login(users[0], "admin")
+    response = None
+
+    def load():
+        nonlocal response
+        response = admin.get(f"/admin/pending?per_page={per_page}")
+
+    # A count and a page for each list, plus one IN query for the flagged page's reports
+    assert count_selects(load) == 5
+    assert response.status_code == 200
+    assert response.data.count(b"off topic") == per_page
+
+
+def test_admin_pending_skips_report_query_without_flagged_posts(app, users, login, make_posts, count_selects):
+    make_posts(30, status="Pending")
+    admin = login(users[0], "admin")
+    assert count_selects(lambda: admin.get("/admin/pending?per_page=100")) == 4
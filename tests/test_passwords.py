@@ -0,0 +1,25 @@
+import pytest
+from flask import Flask
+from werkzeug.security import generate_password_hash
+from model import User
+from passwords import PasswordHasher, hash_length, normalize_method
+
+
+@pytest.mark.parametrize("method", ["pbkdf2:sha256:1000", "pbkdf2:sha512:1000", "scrypt:1024:8:1"])
+def test_hash_length_matches_werkzeug(method):
+    assert hash_length(normalize_method(method)) == len(generate_password_hash("pw", method))
+
+
+def test_longest_methods_fit_the_column():
+    for method in ("pbkdf2:sha512:1000000", "scrypt:32768:8:1"):
+        assert hash_length(normalize_method(method)) <= User.__table__.c.password.type.length
+
+
+def test_init_app_rejects_methods_too_long_for_the_column(monkeypatch):
+    monkeypatch.setattr(User.__table__.c.password.type, "length", 128)
+    app = Flask(__name__)
+    app.config["PASSWORD_HASH_METHOD"] = "pbkdf2:sha512"
+    hasher = PasswordHasher()
+    with pytest.raises(ValueError, match="user.password holds 128"):
+        hasher.init_app(app)
+    assert hasher.method == normalize_method("pbkdf2:sha256")
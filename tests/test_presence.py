@@ -0,0 +1,41 @@
+import time
+from types import SimpleNamespace
+from presence import PresenceRegistry
+
+INTERVAL = 0.1
+
+
+def _registry(directory, worker_id):
+    registry = PresenceRegistry(worker_id=worker_id)
+    app = SimpleNamespace(config={"PRESENCE_DIR": str(directory), "PRESENCE_REFRESH_INTERVAL": INTERVAL})
+    registry.init_app(app, SimpleNamespace(server=None))  # no background task; refresh by hand
+    return registry
+
+
+def test_workers_sharing_a_directory_see_each_others_counts(tmp_path):
+    first = _registry(tmp_path, "first")
+    first.connected("feed")
+    first.connected("feed")
+    first.refresh()
+
+    # init_app refreshes once, so a new worker starts from the host-wide total
+    second = _registry(tmp_path, "second")
+    assert second.count() == 2 and second.count("feed") == 2
+    second.connected("feed")
+    second.refresh()
+    first.refresh()
+    assert first.count() == second.count() == 3
+
+
+def test_stale_worker_file_is_ignored(tmp_path):
+    live, stale = _registry(tmp_path, "live"), _registry(tmp_path, "stale")
+    live.connected("feed")
+    stale.connected("feed")
+    stale.refresh()
+    live.refresh()
+    assert live.count() == 2
+
+    time.sleep(3 * INTERVAL + 0.05)  # the stale worker stops refreshing
+    live.refresh()
+    assert live.count() == 1 and live.count("feed") == 1
+    assert not (tmp_path / "presence-stale.json").exists()
@@ -0,0 +1,19 @@
+from extensions import db
+from migrations import explain_hot_queries, HOT_QUERIES, _plan, _uses_index
+
+
+def test_hot_queries_seek_their_index_without_sorting(app):
+    with app.app_context():
+        results = explain_hot_queries(db.engine)
+    assert len(results) == len(HOT_QUERIES)
+    for name, expected, used, sorts, ok in results:
+        assert ok, f"{name}: expected {expected}, used {used}, sort step: {sorts}"
+
+
+def test_sort_step_and_wrong_index_fail(app):
+    with app.app_context(), db.engine.connect() as conn:
+        used, sorts = _plan(conn, "SELECT id FROM posts WHERE status IN ('Approved', 'admin') "
+                                  "ORDER BY upvotes DESC, id DESC LIMIT 51")
+    assert used == ["ix_posts_status_upvotes"] and sorts
+    assert _uses_index("sqlite", "unique_user_badge", ["sqlite_autoindex_user_badge_1"])
+    assert not _uses_index("sqlite", "ix_posts_status_upvotes", ["sqlite_autoindex_posts_1"])
@@ -0,0 +1,37 @@
+import pytest
+from datetime import datetime
+from sqlalchemy import update
+from extensions import db
+from model import Post
+
+
+@pytest.fixture
+def populated(app, users, make_posts):
+    make_posts(20, status="Approved")
+    make_posts(5, status="Pending")
+    make_posts(5, status="Declined")
+    with app.app_context():
+        # Naive timestamps, as rows written before UTCDateTime have them
+        db.session.execute(update(Post).values(reviewed_at=datetime(2024, 1, 1, 12, 0)))
+        db.session.commit()
+
+
+@pytest.mark.parametrize("url, role", [
+    ("/admin", "admin"),
+    ("/admin/approved", "admin"),
+    ("/admin/all", "admin"),
+    ("/dashboard", "user"),
+])
+def test_read_pages_write_nothing(app, users, login, populated, statements, url, role):
+    client = login(users[0] if role == "admin" else users[1], role)
+    responses = []
+
+    def load():
+        responses.append(client.get(url))
+
+    # The first load may seed the user's stats row (an INSERT), but never rewrites a post
+    first = statements(load)
+    assert not [sql for sql in first if sql.upper().startswith("UPDATE")]
+    warm = statements(load)
+    assert [r.status_code for r in responses] == [200, 200]
+    assert [sql for sql in warm if not sql.upper().startswith("SELECT")] == []
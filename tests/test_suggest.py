@@ -0,0 +1,76 @@
+import time
+import pytest
+from suggest import SuggestionIndex, MAX_QUERY_WORDS
+
+
+@pytest.fixture
+def built_index(app):
+    app.config["SUGGEST_INDEX_ENABLED"] = True
+    app.config["SUGGEST_REFRESH_INTERVAL"] = 0.05
+    indexes = []
+
+    def build(**options):
+        index = SuggestionIndex(**options)
+        index.init_app(app)
+        indexes.append(index)
+        _wait_for(lambda: index.ready)
+        return index
+
+    yield build
+    for index in indexes:
+        index.enabled = False  # ends the catch-up loop
+
+
+def _wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_suggestions_are_confirmed_in_memory_without_queries(app, make_posts, built_index, statements):
+    short = make_posts(3)
+    long = make_posts(1, content="coffee " + "filler " * 200 + "zeppelin at the end")[0]
+    collision = make_posts(1, content="tea zebra pelican")[0]  # has every trigram of "zepp" but no such word
+    index = built_index()
+    assert index.stats()["posts"] == 5
+
+    found = {}
+
+    def run():
+        found["coffee"] = [r["id"] for r in index.suggest("coffee", limit=10)]
+        found["zepp"] = [r["id"] for r in index.suggest("zepp")]
+        found["filler zepp"] = [r["id"] for r in index.suggest("filler zepp")]
+        found["zeppelin the"] = [r["id"] for r in index.suggest("zeppelin the")]
+
+    with app.test_request_context():
+        assert statements(run) == []
+    assert found == {"coffee": [long] + short[::-1], "zepp": [long], "filler zepp": [long],
+                     "zeppelin the": [long]}
+    assert collision not in found["zepp"]
+
+
+def test_background_task_catches_up_with_other_workers_posts(app, make_posts, built_index):
+    index = built_index()
+    # Written straight to the table, as another worker would, without calling index.add
+    post_id = make_posts(1, content="espresso machine broken")[0]
+    assert _wait_for(lambda: index.suggest("espr") != [])
+    assert [r["id"] for r in index.suggest("espr")] == [post_id]
+
+
+def test_query_and_word_cache_are_capped(app, make_posts, built_index):
+    make_posts(1, content="alpha beta gamma delta epsilon zeta eta theta iota kappa")
+    index = built_index(max_cached_words=3)
+    assert len(index._word_grams) == 3
+    # Words past MAX_QUERY_WORDS are ignored rather than intersected
+    query = " ".join(["alpha"] * MAX_QUERY_WORDS + ["nomatch"])
+    assert len(index.suggest(query)) == 1
+    assert len(index.suggest("alpha " * 1000)) == 1
+
+
+def test_no_suggestions_until_built(app, make_posts):
+    make_posts(2)
+    index = SuggestionIndex()
+    assert index.suggest("coffee") == []
+    index.add(99, "HR", "coffee")  # ignored until the build has run
+    assert index.stats()["posts"] == 0
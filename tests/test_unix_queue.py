@@ -0,0 +1,33 @@
+import multiprocessing
+import time
+from unix_queue import UnixSocketManager
+
+MESSAGES = 200
+
+
+def _listen(url, ready, results):
+    manager = UnixSocketManager(url)
+    manager._bind()
+    ready.set()
+    for _, message in zip(range(MESSAGES), manager._listen()):
+        results.put((message["seq"], time.time() - message["sent"]))
+
+
+def test_publish_reaches_another_process_quickly(tmp_path):
+    url = f"unix://{tmp_path}"
+    context = multiprocessing.get_context("spawn")
+    ready, results = context.Event(), context.Queue()
+    listener = context.Process(target=_listen, args=(url, ready, results), daemon=True)
+    listener.start()
+    assert ready.wait(30)
+
+    publisher = UnixSocketManager(url, write_only=True)
+    for seq in range(MESSAGES):
+        publisher._publish({"seq": seq, "sent": time.time()})
+        time.sleep(0.001)
+    received = [results.get(timeout=10) for _ in range(MESSAGES)]
+    listener.join(10)
+
+    assert [seq for seq, _ in received] == list(range(MESSAGES))
+    latencies = sorted(latency for _, latency in received)
+    assert latencies[int(MESSAGES * 0.99)] < 0.05
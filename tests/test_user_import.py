@@ -0,0 +1,25 @@
+import json
+from model import User
+from user_import import import_users, parse_records, generate_password
+
+
+def test_wrongly_typed_fields_are_reported_and_the_import_continues(app, users):
+    records = parse_records(json.dumps([
+        {"email": 5, "name": "Numeric Email"},
+        {"email": "list@example.com", "name": ["Not", "A", "Name"]},
+        {"email": "flag@example.com", "name": "Flag", "role": True},
+        {"email": " Good@Example.com ", "first_name": "Good", "last_name": "User", "password": 1234},
+    ]), "users.json")
+    with app.app_context():
+        results = list(import_users(records))
+        assert [r["status"] for r in results] == ["invalid", "invalid", "invalid", "created", "done"]
+        assert results[0]["message"] == "Missing or invalid email"
+        assert results[1]["message"] == "'name' must be text, not list"
+        good = User.query.filter_by(email="good@example.com").one()
+        assert good.name == "Good User"
+        assert "temporary_password" not in results[3]
+
+
+def test_generated_passwords_are_alphanumeric():
+    password = generate_password(16)
+    assert len(password) == 16 and password.isalnum()
@@ -0,0 +1,46 @@
+from sqlalchemy import select
+from extensions import db
+from model import Post, UserBadge
+from user_stats import get_user_stats
+from achievements import evaluate_achievements
+from votes import cast_vote
+
+
+def _badges(app, user_id):
+    with app.app_context():
+        return set(db.session.execute(select(UserBadge.badge_name).where(UserBadge.user_id == user_id)).scalars())
+
+
+def test_counters_follow_votes_submissions_and_approvals(app, users, login, make_posts):
+    admin_id, user_id = users
+    target = make_posts(1, status="Approved")[0]
+    with app.app_context():
+        before = get_user_stats(user_id)  # seeded from history: one submission, one approved post
+        assert before == (0, 1, 1)
+        cast_vote(user_id, target, "upvote")
+        assert get_user_stats(user_id) == (1, 1, 1)
+
+    client = login(user_id, "user")
+    assert client.post("/submit-feedback", json={"category": "HR", "content": "More coffee"}).status_code == 200
+    with app.app_context():
+        assert get_user_stats(user_id) == (1, 2, 1)
+        new_post = db.session.execute(select(Post.id).order_by(Post.id.desc())).scalar()
+
+    login(admin_id, "admin").post(f"/admin/approve/{new_post}")
+    with app.app_context():
+        assert get_user_stats(user_id) == (1, 2, 2)
+        cast_vote(user_id, target, "upvote")  # withdrawing the vote takes it back off the counter
+        assert get_user_stats(user_id) == (0, 2, 2)
+    assert {"First Vote", "First Submission", "First Post"} <= _badges(app, user_id)
+
+
+def test_badge_check_reads_counters_instead_of_counting_history(app, users, make_posts, statements):
+    user_id = users[1]
+    make_posts(1, status="Approved")
+    with app.app_context():
+        get_user_stats(user_id)
+        evaluate_achievements(user_id)  # loads the rule set once
+
+    with app.test_request_context():
+        executed = statements(lambda: evaluate_achievements(user_id))
+    assert executed and not [sql for sql in executed if "count(" in sql.lower()]
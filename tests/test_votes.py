@@ -0,0 +1,47 @@
+import threading
+from sqlalchemy import select, func
+from extensions import db
+from model import User, Post, UserVote
+from user_stats import get_user_stats
+from votes import cast_vote
+
+VOTERS = 30
+VOTES_EACH = 5  # up, down, up, down, up: every voter ends on an upvote
+
+
+def test_concurrent_votes_on_one_post_lose_no_updates(app, make_posts):
+    post_id = make_posts(1)[0]  # the first post starts at 0 upvotes
+    with app.app_context():
+        voters = [User(email=f"voter{i}@example.com", name=f"Voter {i}", password="x", role="user", points=0)
+                  for i in range(VOTERS)]
+        db.session.add_all(voters)
+        db.session.commit()
+        voter_ids = [u.id for u in voters]
+
+    start = threading.Barrier(VOTERS)
+    errors = []
+
+    def vote(user_id):
+        with app.app_context():
+            start.wait()
+            try:
+                for i in range(VOTES_EACH):
+                    cast_vote(user_id, post_id, "upvote" if i % 2 == 0 else "downvote")
+            except Exception as e:  # collected so the assertion shows what went wrong
+                errors.append(e)
+
+    threads = [threading.Thread(target=vote, args=(uid,)) for uid in voter_ids]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not errors
+    with app.app_context():
+        post = db.session.get(Post, post_id)
+        assert (post.upvotes, post.downvotes) == (VOTERS, 0)
+        assert db.session.execute(
+            select(func.count()).select_from(UserVote).where(UserVote.post_id == post_id)).scalar() == VOTERS
+        points = db.session.execute(select(User.points).where(User.id.in_(voter_ids))).scalars().all()
+        assert points == [VOTES_EACH] * VOTERS
+        assert all(get_user_stats(uid)[0] == 1 for uid in voter_ids)
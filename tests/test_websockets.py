@@ -0,0 +1,34 @@
+import time
+from datetime import timedelta
+from flask_jwt_extended import create_access_token
+from extensions import socketio
+from presence import presence
+from websockets import publish_post_counts, COALESCE_WINDOW
+
+
+def _events(client, name):
+    return [e["args"] for e in client.get_received() if e["name"] == name]
+
+
+def test_coalesced_counts_are_emitted_without_gevent_patching(app, login, users):
+    assert app.config["SOCKETIO_ASYNC_MODE"] == "threading"
+    client = socketio.test_client(app, flask_test_client=login(users[1], "user"))
+    client.get_received()
+    publish_post_counts(7, 1, 0)
+    publish_post_counts(7, 2, 0)
+    time.sleep(COALESCE_WINDOW + 0.3)
+    assert _events(client, "post_counts") == [[[{"post_id": 7, "upvotes": 2, "downvotes": 0}]]]
+    client.disconnect()
+
+
+def test_expired_token_disconnect_leaves_presence(app, users):
+    with app.app_context():
+        token = create_access_token(identity=str(users[1]), expires_delta=timedelta(seconds=1))
+    before = presence.count()
+    client = socketio.test_client(app, query_string=f"token={token}")
+    assert client.is_connected() and presence.count() == before + 1
+
+    time.sleep(1.2)
+    client.emit("send_message", {"message": "still here?"})
+    assert not client.is_connected()
+    assert presence.count() == before
@@ -0,0 +1,81 @@
+# Description: a Socket.IO client manager that fans events out between the
+# gunicorn workers on one host without an external broker.
+#
+# Every worker binds a Unix datagram socket in a shared directory (tmpfs by
+# default). Publishing an event sends one datagram to each socket in that
+# directory, and each worker's listener re-emits it to its own clients. It
+# plugs into the same PubSubManager interface as socketio.RedisManager, so
+# moving to Redis later only means changing SOCKETIO_MESSAGE_QUEUE.
+
+import atexit
+import json
+import os
+import socket
+from urllib.parse import urlparse
+
+from socketio import PubSubManager
+
+# Datagrams larger than this are dropped by the receiver; feed events are tiny
+MAX_DATAGRAM = 64 * 1024
+
+
+class UnixSocketManager(PubSubManager):
+    """PubSubManager over Unix datagram sockets, e.g. ``unix:///dev/shm/insightboard-sio``."""
+
+    name = 'unix'
+
+    def __init__(self, url='unix:///dev/shm/insightboard-sio', channel='flask-socketio',
+                 write_only=False, logger=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.directory = urlparse(url).path
+        os.makedirs(self.directory, exist_ok=True)
+        self._sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sender.setblocking(False)
+        self._listener = None
+        self._path = None
+
+    def _peer_paths(self):
+        prefix = self.channel + '-'
+        for name in os.listdir(self.directory):
+            if name.startswith(prefix) and name.endswith('.sock'):
+                yield os.path.join(self.directory, name)
+
+    def _publish(self, data):
+        # Our own socket is included on purpose: PubSubManager drops messages
+        # carrying its own host_id, and older versions rely on the loopback.
+        payload = json.dumps(data).encode()
+        for path in self._peer_paths():
+            try:
+                self._sender.sendto(payload, path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Nobody is bound there any more: a worker that died without cleaning up
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+            except BlockingIOError:
+                self._get_logger().warning('Socket.IO fan-out to %s dropped: receiver backlog full', path)
+
+    def _bind(self):
+        # Bound lazily, in the worker process that actually listens (after any fork)
+        self._path = os.path.join(self.directory, f'{self.channel}-{os.getpid()}-{self.host_id[:8]}.sock')
+        self._listener = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._listener.bind(self._path)
+        atexit.register(self._cleanup)
+
+    def _cleanup(self):
+        if self._path:
+            try:
+                os.unlink(self._path)
+            except FileNotFoundError:
+                pass
+
+    def _listen(self):
+        if self._listener is None:
+            self._bind()
+        while True:
+            payload = self._listener.recv(MAX_DATAGRAM)
+            try:
+                yield json.loads(payload)
+            except ValueError:
+                self._get_logger().warning('Ignoring malformed Socket.IO fan-out message')
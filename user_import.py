@@ -0,0 +1,114 @@
+# Description: bulk user provisioning from CSV or JSON, including the legacy
+# Archive/admin_backend/users.json format ({"first_name", "last_name",
+# "email", "role", "password"} objects; its "id" is ignored).
+#
+# Records are processed in chunks: one IN query finds the emails that already
+# exist, the chunk's passwords are hashed in parallel (passwords.hash_many)
+# and the new users go in with a single executemany INSERT and one commit.
+# import_users() yields one result per record as it goes, so callers can
+# stream progress back instead of waiting for the whole file.
+
+import csv
+import io
+import json
+import secrets
+import string
+from sqlalchemy import select, insert
+from extensions import db
+from model import User
+from passwords import passwords
+
+ROLES = ("user", "admin")
+
+
+def generate_password(length=10):
+    alphabet = string.ascii_letters + string.digits
+    return ''.join(secrets.choice(alphabet) for _ in range(length))
+
+
+def parse_records(data, filename=""):
+    """Turn an uploaded CSV or JSON document into a list of record dicts."""
+    text = data.decode("utf-8-sig") if isinstance(data, bytes) else data
+    if filename.lower().endswith(".csv") or not text.lstrip().startswith(("[", "{")):
+        return list(csv.DictReader(io.StringIO(text)))
+    parsed = json.loads(text)
+    if isinstance(parsed, dict):
+        parsed = parsed.get("users", [])
+    if not isinstance(parsed, list) or not all(isinstance(r, dict) for r in parsed):
+        raise ValueError("JSON must be a list of user objects (or {\"users\": [...]})")
+    return parsed
+
+
+def _text(record, field, strip=True):
+    """A field as text ('' if missing); numbers are accepted, other JSON values are not."""
+    value = record.get(field)
+    if value is None:
+        return ""
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        raise ValueError(f"'{field}' must be text, not {type(value).__name__}")
+    return str(value).strip() if strip else str(value)
+
+
+def _clean(record):
+    """Normalised (email, name, role, password) or an error message."""
+    try:
+        email = _text(record, "email").lower()
+        name = _text(record, "name") or f"{_text(record, 'first_name')} {_text(record, 'last_name')}".strip()
+        role = (_text(record, "role") or "user").lower()
+        password = _text(record, "password", strip=False) or None
+    except ValueError as e:
+        return None, str(e)
+    if "@" not in email:
+        return None, "Missing or invalid email"
+    if not name:
+        return None, "Missing name"
+    if role not in ROLES:
+        return None, f"Unknown role '{role}'"
+    return (email, name, role, password), None
+
+
+def import_users(records, chunk_size=500):
+    """Create users for ``records``, yielding one result dict per record and a final summary."""
+    created = skipped = 0
+    seen = set()
+    for start in range(0, len(records), chunk_size):
+        chunk = records[start:start + chunk_size]
+        results, candidates = [], []
+        for offset, record in enumerate(chunk):
+            row = start + offset + 1
+            cleaned, error = _clean(record)
+            if error:
+                results.append({"row": row, "email": record.get("email"), "status": "invalid", "message": error})
+            elif cleaned[0] in seen:
+                results.append({"row": row, "email": cleaned[0], "status": "duplicate",
+                                "message": "Email appears earlier in this import"})
+            else:
+                seen.add(cleaned[0])
+                candidates.append((row, cleaned))
+
+        existing = set(db.session.execute(
+            select(User.email).where(User.email.in_([c[1][0] for c in candidates]))
+        ).scalars()) if candidates else set()
+        new = [(row, c) for row, c in candidates if c[0] not in existing]
+        for row, c in candidates:
+            if c[0] in existing:
+                results.append({"row": row, "email": c[0], "status": "duplicate", "message": "Email already exists"})
+
+        if new:
+            plain = [c[3] or generate_password() for _, c in new]
+            hashes = passwords.hash_many(plain)
+            db.session.execute(insert(User), [
+                {"email": c[0], "name": c[1], "role": c[2], "password": hashed, "failed_attempts": 0, "points": 0}
+                for (_, c), hashed in zip(new, hashes)
+            ])
+            db.session.commit()
+            for (row, c), password in zip(new, plain):
+                result = {"row": row, "email": c[0], "status": "created"}
+                if not c[3]:
+                    result["temporary_password"] = password
+                results.append(result)
+
+        created += len(new)
+        skipped += len(chunk) - len(new)
+        yield from sorted(results, key=lambda r: r["row"])
+    yield {"status": "done", "created": created, "skipped": skipped}
@@ -0,0 +1,62 @@
+# Description: helpers for the UserStats counters that back badge checks and
+# badge progress. Events call bump_user_stats() inside their own transaction
+# so the counters commit (or roll back) together with the change they count.
+
+from sqlalchemy import select, update, func
+from extensions import db
+from model import Post, UserVote, UserStats, insert_ignore
+
+
+def _count_history(user_id):
+    """Count the user's votes, submissions and approved posts in one round trip."""
+    row = db.session.execute(select(
+        select(func.count()).select_from(UserVote).where(UserVote.user_id == user_id).scalar_subquery(),
+        select(func.count()).select_from(Post).where(Post.created_by == user_id).scalar_subquery(),
+        select(func.count()).select_from(Post)
+            .where(Post.created_by == user_id, Post.status == 'Approved').scalar_subquery(),
+    )).one()
+    return {'vote_count': row[0], 'submission_count': row[1], 'approved_count': row[2]}
+
+
+def _seed_user_stats(user_id):
+    """Insert the user's stats row from history; returns False if someone else inserted it first."""
+    counts = _count_history(user_id)
+    return db.session.execute(insert_ignore(UserStats).values(user_id=user_id, **counts)).rowcount == 1
+
+
+def bump_user_stats(user_id, votes=0, submissions=0, approved=0):
+    """Apply counter deltas for an event; the caller commits."""
+    if not (votes or submissions or approved):
+        return
+    # Flush first so a lazily seeded row counts the ORM changes of this event
+    db.session.flush()
+    stmt = update(UserStats).where(UserStats.user_id == user_id).values(
+        vote_count=UserStats.vote_count + votes,
+        submission_count=UserStats.submission_count + submissions,
+        approved_count=UserStats.approved_count + approved,
+    )
+    no_sync = {"synchronize_session": False}
+    if db.session.execute(stmt, execution_options=no_sync).rowcount == 0:
+        # First event for this user: counting history already includes this
+        # event. If a concurrent request seeded the row first, its snapshot
+        # could not see our uncommitted change, so apply the delta after all.
+        if not _seed_user_stats(user_id):
+            db.session.execute(stmt, execution_options=no_sync)
+
+
+def get_user_stats(user_id):
+    """Return (vote_count, submission_count, approved_count) for the user.
+
+    A missing row is seeded from history and committed, so this costs a single
+    primary-key lookup from then on.
+    """
+    row = db.session.execute(
+        select(UserStats.vote_count, UserStats.submission_count, UserStats.approved_count)
+        .where(UserStats.user_id == user_id)
+    ).one_or_none()
+    if row is None:
+        counts = _count_history(user_id)
+        db.session.execute(insert_ignore(UserStats).values(user_id=user_id, **counts))
+        db.session.commit()
+        return counts['vote_count'], counts['submission_count'], counts['approved_count']
+    return tuple(row)
@@ -0,0 +1,258 @@
+# Description: the vote write path shared by the upvote and downvote routes.
+# A vote is one short transaction: claim the user's vote row with a conditional
+# write, then apply SQL-side increments to the user and post counters. Nothing
+# is read into Python and written back, so concurrent voters cannot lose updates.
+#
+# With VOTE_WRITE_BEHIND enabled the vote row is still written immediately, but
+# the counter deltas are parked in vote_buffer and flushed to the database in
+# batches, so a voting storm on one post no longer serializes on its row lock.
+
+import atexit
+import threading
+from sqlalchemy import select, update, delete, case, func, bindparam
+from extensions import db
+from model import Post, User, UserVote, insert_ignore
+from user_stats import bump_user_stats
+from feed_cache import feed_cache
+
+# (previous vote, requested vote) -> (upvotes delta, downvotes delta, points delta)
+# Repeating a vote withdraws it; voting the other way switches it.
+TRANSITIONS = {
+    (None, 'upvote'): (1, 0, 1),
+    ('upvote', 'upvote'): (-1, 0, -1),
+    ('downvote', 'upvote'): (1, -1, 1),
+    (None, 'downvote'): (0, 1, 1),
+    ('downvote', 'downvote'): (0, -1, -1),
+    ('upvote', 'downvote'): (-1, 1, 1),
+}
+
+MAX_ATTEMPTS = 3
+
+
+class VoteConflict(Exception):
+    """Raised when the user's vote row kept changing underneath us."""
+
+
+def _add_clamped(column, delta):
+    """SQL expression for ``column + delta`` that never drops below zero."""
+    current = func.coalesce(column, 0)
+    if delta >= 0:
+        return current + delta
+    return case((current + delta < 0, 0), else_=current + delta)
+
+
+def _add_clamped_param(column, name):
+    """Like _add_clamped, but for a delta supplied per row of an executemany."""
+    total = func.coalesce(column, 0) + bindparam(name)
+    return case((total < 0, 0), else_=total)
+
+
+class VoteCounterBuffer:
+    """Write-behind buffer for post vote counts and user points.
+
+    Deltas accumulate in memory and are flushed as two executemany UPDATEs,
+    either every ``interval`` seconds or as soon as ``max_pending`` posts and
+    users have pending changes. A final flush runs when the worker exits.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.interval = 2.0
+        self.max_pending = 500
+        self._app = None
+        self._lock = threading.Lock()
+        self._posts = {}   # post_id -> [upvotes delta, downvotes delta]
+        self._points = {}  # user_id -> points delta
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def init_app(self, app):
+        self.enabled = app.config.get('VOTE_WRITE_BEHIND', False)
+        if not self.enabled:
+            return
+        self._app = app
+        self.interval = app.config.get('VOTE_FLUSH_INTERVAL', self.interval)
+        self.max_pending = app.config.get('VOTE_FLUSH_MAX_PENDING', self.max_pending)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='vote-flush', daemon=True)
+            self._thread.start()
+            atexit.register(self.shutdown)
+
+    def add(self, user_id, post_id, up_delta, down_delta, points_delta):
+        with self._lock:
+            pending = self._posts.setdefault(post_id, [0, 0])
+            pending[0] += up_delta
+            pending[1] += down_delta
+            self._points[user_id] = self._points.get(user_id, 0) + points_delta
+            full = len(self._posts) + len(self._points) >= self.max_pending
+        if full:
+            self._wake.set()
+
+    def pending_for_post(self, post_id):
+        with self._lock:
+            up, down = self._posts.get(post_id, (0, 0))
+        return up, down
+
+    def pending_for_user(self, user_id):
+        with self._lock:
+            return self._points.get(user_id, 0)
+
+    def pending_posts(self):
+        """Snapshot of post_id -> (upvotes delta, downvotes delta) for merging into reads."""
+        with self._lock:
+            return {pid: tuple(d) for pid, d in self._posts.items()}
+
+    def flush(self):
+        """Write all pending deltas; on failure they are put back for the next flush."""
+        with self._lock:
+            posts, points = self._posts, self._points
+            self._posts, self._points = {}, {}
+        if not posts and not points:
+            return 0
+
+        post_rows = [{'b_id': pid, 'b_up': up, 'b_down': down}
+                     for pid, (up, down) in posts.items() if up or down]
+        user_rows = [{'b_id': uid, 'b_points': delta} for uid, delta in points.items() if delta]
+        posts_table, users_table = Post.__table__, User.__table__
+        try:
+            with self._app.app_context():
+                if user_rows:
+                    db.session.execute(
+                        update(users_table).where(users_table.c.id == bindparam('b_id'))
+                                           .values(points=_add_clamped_param(users_table.c.points, 'b_points')),
+                        user_rows
+                    )
+                if post_rows:
+                    db.session.execute(
+                        update(posts_table).where(posts_table.c.id == bindparam('b_id'))
+                                           .values(upvotes=_add_clamped_param(posts_table.c.upvotes, 'b_up'),
+                                                   downvotes=_add_clamped_param(posts_table.c.downvotes, 'b_down')),
+                        post_rows
+                    )
+                db.session.commit()
+            # Cached feed rows hold the pre-flush counts, which no longer match DB + pending
+            feed_cache.bump()
+        except Exception:
+            self._app.logger.exception("Vote counter flush failed; keeping deltas for the next attempt")
+            with self._lock:
+                for pid, (up, down) in posts.items():
+                    pending = self._posts.setdefault(pid, [0, 0])
+                    pending[0] += up
+                    pending[1] += down
+                for uid, delta in points.items():
+                    self._points[uid] = self._points.get(uid, 0) + delta
+            return 0
+        return len(post_rows) + len(user_rows)
+
+    def shutdown(self):
+        self._stopped.set()
+        self._wake.set()
+        if self.enabled and self._app is not None:
+            self.flush()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if not self._stopped.is_set():
+                self.flush()
+
+
+vote_buffer = VoteCounterBuffer()
+
+
+def _claim_vote_row(user_id, post_id, previous, vote_type):
+    """Move the user's vote row from ``previous`` to its next state.
+
+    Every branch is conditional on the state we read, so its rowcount tells us
+    whether a concurrent request for the same user/post got there first.
+    """
+    match = (UserVote.user_id == user_id, UserVote.post_id == post_id)
+    if previous is None:
+        stmt = insert_ignore(UserVote).values(user_id=user_id, post_id=post_id, vote_type=vote_type)
+    elif previous == vote_type:
+        stmt = delete(UserVote).where(*match, UserVote.vote_type == previous)
+    else:
+        stmt = update(UserVote).where(*match, UserVote.vote_type == previous).values(vote_type=vote_type)
+    return db.session.execute(stmt, execution_options={"synchronize_session": False}).rowcount == 1
+
+
+def apply_vote_deltas(user_id, post_id, up_delta, down_delta, points_delta):
+    """Apply counter deltas in SQL; returns False if the user or post does not exist."""
+    no_sync = {"synchronize_session": False}
+    # The post row is the contended one, so it is locked last and held only until commit
+    user_rows = db.session.execute(
+        update(User).where(User.id == user_id).values(points=_add_clamped(User.points, points_delta)),
+        execution_options=no_sync
+    ).rowcount
+    post_rows = db.session.execute(
+        update(Post).where(Post.id == post_id).values(
+            upvotes=_add_clamped(Post.upvotes, up_delta),
+            downvotes=_add_clamped(Post.downvotes, down_delta)
+        ),
+        execution_options=no_sync
+    ).rowcount
+    return user_rows == 1 and post_rows == 1
+
+
+def _read_counts(user_id, post_id):
+    """Post counters and user points in one round trip; None if either row is missing."""
+    return db.session.execute(
+        select(Post.upvotes, Post.downvotes, User.points)
+        .join(User, User.id == user_id)
+        .where(Post.id == post_id)
+    ).one_or_none()
+
+
+def cast_vote(user_id, post_id, vote_type):
+    """Record an upvote/downvote toggle and return the post's counts and the user's points.
+
+    Returns None if the user or post does not exist.
+    """
+    for _ in range(MAX_ATTEMPTS):
+        previous = db.session.execute(
+            select(UserVote.vote_type).where(UserVote.user_id == user_id, UserVote.post_id == post_id)
+        ).scalar()
+        if _claim_vote_row(user_id, post_id, previous, vote_type):
+            break
+        # Another request for this user/post changed the row first; start over from a fresh read
+        db.session.rollback()
+    else:
+        raise VoteConflict(f"vote on post {post_id} by user {user_id} kept conflicting")
+
+    up_delta, down_delta, points_delta = TRANSITIONS[(previous, vote_type)]
+    # A new vote adds a user_vote row and withdrawing one deletes it; switching keeps the count
+    bump_user_stats(user_id, votes=1 if previous is None else -1 if previous == vote_type else 0)
+    if vote_buffer.enabled:
+        return _cast_buffered_vote(user_id, post_id, previous, vote_type, up_delta, down_delta, points_delta)
+    if not apply_vote_deltas(user_id, post_id, up_delta, down_delta, points_delta):
+        db.session.rollback()
+        return None
+
+    counts = _read_counts(user_id, post_id)
+    db.session.commit()
+    return {
+        'upvotes': counts.upvotes,
+        'downvotes': counts.downvotes,
+        'points': counts.points,
+        'vote': None if previous == vote_type else vote_type,
+    }
+
+
+def _cast_buffered_vote(user_id, post_id, previous, vote_type, up_delta, down_delta, points_delta):
+    """Commit only the vote row now; hand the counter deltas to vote_buffer."""
+    counts = _read_counts(user_id, post_id)
+    if counts is None:
+        db.session.rollback()
+        return None
+    db.session.commit()
+
+    vote_buffer.add(user_id, post_id, up_delta, down_delta, points_delta)
+    pending_up, pending_down = vote_buffer.pending_for_post(post_id)
+    return {
+        'upvotes': max(0, (counts.upvotes or 0) + pending_up),
+        'downvotes': max(0, (counts.downvotes or 0) + pending_down),
+        'points': max(0, (counts.points or 0) + vote_buffer.pending_for_user(user_id)),
+        'vote': None if previous == vote_type else vote_type,
+    }
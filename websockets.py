@@ -1,156 +1,151 @@
-# Description: this file contains all of your websocket event handlers
-# You need handlers for connecting, sending a message, and disconnecting
-# Update the handlers below to work with your model and and your application
-# Note: you can hand chatgpt a handler, tell it what you want the handler
-# to do, and ask it to update the code for you.
-
-from flask_socketio import emit, disconnect
-from flask import request
+# Description: Socket.IO handlers for the live feed. Clients authenticate once
+# on connect (login session or JWT), join the feed room and are counted in the
+# presence registry; later events reuse the identity cached for their sid.
+#
+# Vote counts are pushed with publish_post_counts. Updates arriving within
+# COALESCE_WINDOW are merged per post and sent as one 'post_counts' event
+# holding the latest {post_id, upvotes, downvotes} of every post that changed,
+# so a burst of votes costs one broadcast rather than one per vote.
+
+from flask_socketio import emit, disconnect, join_room
+from flask import request, session
 from flask_jwt_extended import decode_token
-
-# IMPORTANT: import any objects from your model.py file that you need to work with here
-#            uncomment the line below and update it to match your model
-#from model import oneOfMyObjects, anotherOfMyObjects
+import threading
+import time
+from collections import namedtuple
 
 from extensions import db, socketio  # Import socketio and db from extensions.py
+from presence import presence
+
+# Every authenticated client joins this room and receives live feed updates
+FEED_ROOM = 'feed'
+
+# Count updates for the same post inside this window are merged into one emit
+COALESCE_WINDOW = 0.25
+
+_pending_counts = {}  # post_id -> latest {post_id, upvotes, downvotes}
+_pending_lock = threading.Lock()
+_flush_scheduled = False
+
+
+# Identity resolved once per connection: sid -> SocketIdentity. Later events
+# look the sender up here instead of decoding a token again.
+SocketIdentity = namedtuple('SocketIdentity', 'user_id role name exp')
+_connections = {}
+
+
+def _authenticate():
+    """Resolve the connecting client from its login session or a JWT, else None."""
+    if session.get('user_id'):
+        # Session cookies are already verified by Flask; they carry no expiry of their own
+        return SocketIdentity(session['user_id'], session.get('user_role'), session.get('first_name'), None)
+    token = request.args.get('token')
+    if token:
+        decoded_token = decode_token(token)  # raises if the token is invalid or expired
+        return SocketIdentity(decoded_token['sub'], decoded_token.get('role'),
+                              decoded_token.get('name'), decoded_token.get('exp'))
+    return None
+
+
+def current_identity():
+    """The cached identity of the client that sent the current event, or None.
+
+    Expiry is checked against the cached ``exp`` claim. An expired connection
+    stays registered until its disconnect handler runs, which also takes it
+    off the presence count.
+    """
+    identity = _connections.get(request.sid)
+    if identity is not None and identity.exp is not None and identity.exp <= time.time():
+        return None
+    return identity
+
+
+def publish_post_counts(post_id, upvotes, downvotes):
+    """Queue a {post_id, upvotes, downvotes} update for live feed clients.
+
+    Updates are coalesced per post: the first one starts a short timer and
+    everything published before it fires goes out as a single 'post_counts'
+    batch carrying only the latest counts for each post.
+    """
+    global _flush_scheduled
+    if socketio.server is None:  # websockets not initialised (e.g. CLI commands)
+        return
+    with _pending_lock:
+        _pending_counts[post_id] = {'post_id': post_id, 'upvotes': upvotes or 0, 'downvotes': downvotes or 0}
+        if _flush_scheduled:
+            return
+        _flush_scheduled = True
+    socketio.start_background_task(_flush_post_counts)
+
+
+def _flush_post_counts():
+    global _flush_scheduled
+    socketio.sleep(COALESCE_WINDOW)
+    with _pending_lock:
+        batch = list(_pending_counts.values())
+        _pending_counts.clear()
+        _flush_scheduled = False
+    if batch:
+        socketio.emit('post_counts', batch, to=FEED_ROOM)
+
 
 # Function to register WebSocket event handlers for real-time communication
-def register_websocket_handlers(socketio):
+def register_websocket_handlers(socketio, coalesce_window=None):
+    global COALESCE_WINDOW
+    if coalesce_window is not None:
+        COALESCE_WINDOW = coalesce_window
 
     # Note: you need handlers for connect, disconnect, and send_message
     # edit the below to suit your needs for each event
 
-    # Handle the event when a client connects to the WebSocket
+    # Handle the event when a client connects to the WebSocket.
+    # Clients authenticate once here and are then subscribed to the live feed.
     @socketio.on('connect')
     def handle_connect():
-        print("Client attempting to connect...")  # Log connection attempt
-
-        # grabbing the token to authorize the user
-        token = request.args.get('token')  # Retrieve the JWT token from query parameters
-        print(f"Token received: {token}")  # Log the received token
-
-        if not token:
-            print("No token provided, disconnecting client.")
-            # If no token is provided, emit a connection error and disconnect the client
-            emit('connect_error', {'error': 'No token provided. Disconnecting...'})
-            disconnect()
-            return
-
         try:
-            # Decode the JWT token to verify user identity
-            decoded_token = decode_token(token)
-
-            # Query the correct object from your data model to validate the token
-            # EXAMPLE: grabbing the user with a matching email address
-            #user = User.query.filter_by(email=decoded_token['sub']).first()  # Fetch the user by email
-
-            # EXAMPLE: if the user is found, perform any actions needed
-            # for when a user connects, such as broadcasting a message
-            # to all clients that the user has entered the chat
-
-            #if user:
-            #    print(f"Token successfully decoded: {decoded_token}")  # Log successful token decoding
-            #    # Emit a success message to the connected client
-            #    emit('connect_success', {'message': f'Client connected with token: {decoded_token}'})
-            #    # Broadcast a message that the user has entered the chat to all clients
-            #    emit('broadcast_message', {'message': f"{user.name} has entered the chat...", 'user': f"{user.name}", 'event': "new_chatter", 'user_count': f"{count_connected_clients()}"}, broadcast=True)
-            #else:
-            #    emit('broadcast_message', {'error': 'User not found'}, broadcast=False)
-
+            identity = _authenticate()
         except Exception as e:
-            # Handle errors during token decoding and disconnect the client
-            print(f"Error decoding token: {str(e)}")  # Log the specific error encountered
             emit('connect_error', {'error': f'Invalid token: {str(e)}. Disconnecting...'})
             disconnect()
-            print("Client disconnected due to invalid token.")
+            return
+
+        if identity is None:
+            # Neither a login session nor a token: refuse the connection
+            return False
+
+        _connections[request.sid] = identity
+        join_room(FEED_ROOM)
+        presence.connected(FEED_ROOM)
+        emit('connect_success', {'message': 'Subscribed to live feed updates', 'user_count': presence.count()})
 
     # Handle the event when a client sends a message
     @socketio.on('send_message')
     def handle_message(data):
-        message = data.get('message')  # Retrieve the message text
-        token = data.get('token')  # Retrieve the JWT token
-
-        if not token:
-            # If no token is provided, emit an error message
-            emit('broadcast_message', {'error': 'No token provided'}, broadcast=False)
+        identity = current_identity()
+        if identity is None:
+            emit('broadcast_message', {'error': 'Session expired. Please reconnect.'}, broadcast=False)
+            disconnect()
             return
 
-        try:
-            # Decode the JWT token to verify user identity
-            decoded_token = decode_token(token)
-
-            # Query the correct object from your data model to validate the token
-            # EXAMPLE: grabbing the user with a matching email address
-
-            #user = User.query.filter_by(email=decoded_token['sub']).first()  # Fetch the user by email
-
-            # EXAMPLE: if the user is found, perform any actions needed
-            # for when a user connects, such as broadcasting a message
-            # to all clients that the user has entered the chat
-
-            #if user:
-            #    # when sending messages to clients, you can include
-            #    # any additional property/value pairs you want to send
-            #    # along with the message itself.
-            #    # Note: must set broadcast=True to send to all clients
-            #    # otherwise set broadcast=False to only send to the client that sent the message
-            #
-            #    # EXAMPLE: broadcasting a message to all clients including the message, the user's name, and a count of the number of connected clients
-            #    emit('broadcast_message', {'message': f"{user.name}: {message}", 'user': f"{user.name}", 'user_count': f"{count_connected_clients()}"}, broadcast=True)
-            #else:
-            #   emit('broadcast_message', {'error': 'User not found'}, broadcast=False)
-
-        except Exception as e:
-            # Handle errors during token decoding and emit an error message
-            emit('broadcast_message', {'error': f'Invalid token: {str(e)}'}, broadcast=False)
+        message = data.get('message')  # Retrieve the message text
+        name = identity.name or 'Anonymous'
+        emit('broadcast_message', {'message': f"{name}: {message}", 'user': name,
+                                   'user_count': f"{count_connected_clients()}"}, to=FEED_ROOM)
 
     # Handle the event when a client disconnects from the WebSocket
     @socketio.on('disconnect')
-    def handle_disconnect():
-        token = request.args.get('token')  # Retrieve the token from the socket object
-
-        if not token:
-            # If no token is provided, assume an unknown user and broadcast the disconnect event
-            emit('broadcast_message', {'message': f"unknown user has left the chat...", 'event': "remove_chatter", 'user_count': f"{count_connected_clients()}"}, broadcast=True)
-            return
-
-        try:
-            # Decode the token
-            decoded_token = decode_token(token)
-
-            # Query the correct object from your data model to validate the token
-            # EXAMPLE: grabbing the user with a matching email address
-            
-            #user = User.query.filter_by(email=decoded_token['sub']).first()  # Fetch the user by email
-
-            # EXAMPLE: if the user is found, perform any actions needed
-            # for when a user disconnects, such as broadcasting a message
-
-            #if user:
-            #    # Broadcast that the user has left the chat
-            #    emit('broadcast_message', {'message': f"{user.name} has left the chat...", 'user': f"{user.name}", 'event': "remove_chatter", 'user_count': f"{count_connected_clients()}"}, broadcast=True)
-            #else:
-            #    # Broadcast the disconnect event for an unknown user
-            #    emit('broadcast_message', {'message': f"unknown user has left the chat...", 'event': "remove_chatter", 'user_count': f"{count_connected_clients()}"}, broadcast=True)
-
-        except Exception as e:
-            # Log any errors that occur during disconnect handling
-            print(f"Error during disconnect: {str(e)}")
+    def handle_disconnect(reason=None):
+        identity = _connections.pop(request.sid, None)
+        if identity is None:
+            return  # never authenticated, so it was never counted
+        presence.disconnected(FEED_ROOM)
+        name = identity.name or 'unknown user'
+        emit('broadcast_message', {'message': f"{name} has left the chat...", 'event': "remove_chatter",
+                                   'user_count': f"{count_connected_clients()}"}, to=FEED_ROOM)
 
 
 # PLACE ANY UTILITY FUNCTIONS HERE, E.G.:
 # Utility function to count the number of connected clients
-from flask import current_app
-
 def count_connected_clients():
-    # Access the current app's SocketIO instance
-    socketio = current_app.extensions['socketio']  # Retrieve the socketio instance
-
-    # The `eio.sockets` dictionary contains all currently connected clients
-    connected_clients = socketio.server.eio.sockets
-    
-    # Count the number of connected clients
-    clients = len(connected_clients)
-    
-    print(f"Total connected clients: {clients}")  # Log the total number of clients
-    return clients
\ No newline at end of file
+    # Cached host-wide count from the presence registry; no socket table scan per call
+    return presence.count()